@@ -1,69 +1,141 @@
 # backend/app.py
-from flask import Flask, request, jsonify
-from models import db, Transaction, Budget, Category
-from finance import calculate_budget_summary, analyze_spending_patterns
-import requests
+from flask import Blueprint, Flask, Response, current_app, g, request, jsonify, stream_with_context
+from models import db, Transaction, Budget, Category, CategoryRule, MonthlyRollup
+from finance import (
+    calculate_budget_summary, calculate_budget_summary_range, analyze_spending_patterns,
+    spending_timeseries, spending_forecast, effective_budgets, bucket_count, parse_month, month_range,
+    MAX_SUMMARY_MONTHS, TIMESERIES_GRANULARITIES, MAX_TIMESERIES_BUCKETS
+)
+from rollups import update_rollups, rebuild_rollups
+from importer import import_transactions, ImportAborted, RECORD_READERS
+from validation import transaction_values, parse_amount
+from money import from_paise
+from categorizer import fill_categories, parse_rules, recategorize_transactions
+from exporter import EXPORTERS, EXPORT_MIMETYPES, iter_transaction_batches
+from budgets import parse_budget_items, replace_budgets, upsert_budget_versions, version_rows
+from arrow_io import (
+    ARROW_STREAM_MIMETYPE, wants_arrow, arrow_available, transaction_schema, transaction_batch, stream_batches,
+    budget_summary_bytes, budget_summary_range_bytes, spending_patterns_bytes, timeseries_bytes, forecast_bytes
+)
+from json_provider import FastJSONProvider
+from compression import init_compression
+from metrics import init_metrics
+from database import configure_sqlite
+from cache import bump_data_version, cached_response, init_response_cache
+from migrations import init_database
+from sharding import ACCOUNT_HEADER, DEFAULT_ACCOUNT, ShardRouter, parse_account
+from sync import changes_since, current_sync_cursor, record_tombstones
+from reports import (
+    ReportExecutor, QueueFull, parse_report_request, create_report_job, get_report_job, run_report_job, report_job_dict
+)
+from search import search_query, paginate_search
+from queries import parse_day, parse_transaction_filters, apply_transaction_filters, parse_limit, paginate_transactions
 import os
 import logging
+import click
 from flask_cors import CORS
 from datetime import datetime
-
-
-app = Flask(__name__)
-# CORS(app, resources={r"/api/*": {"origins": "http://localhost:8501"}})  # Restrict in production
-CORS(app)  # Allow all origins for development
+from sqlalchemy import delete, insert
+from dateutil.relativedelta import relativedelta
 
 # Logging
 logging.basicConfig(level=logging.INFO)
 
-# Configure SQLite database
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'finance.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
 
-@app.route('/')
+# Routes live on a blueprint so create_app() can build as many apps as it needs
+# (one per test, one per benchmark run); cli_group=None keeps `flask init-db` top level
+api = Blueprint('api', __name__, cli_group=None)
+
+MAX_BULK_DELETE = 10000
+
+@api.route('/')
 def home():
     return "Backend working"
 
 # Transactions Routes
-@app.route('/api/transactions', methods=['GET'])
+@api.route('/api/transactions', methods=['GET'])
 def get_transactions():
-    transactions = Transaction.query.all()
-    return jsonify([{
-        'id': t.id,
-        'date': t.date.isoformat(),
-        'amount': t.amount,
-        'category': t.category,
-        'description': t.description
-    } for t in transactions])
-
-@app.route('/api/transactions', methods=['POST'])
+    try:
+        filters = parse_transaction_filters(request.args)
+        limit = parse_limit(request.args.get('limit'))
+        query = apply_transaction_filters(Transaction.query, filters)
+        # Taken before the page is read, so a client refreshing this page from the change
+        # feed sees everything written after it
+        sync_cursor = current_sync_cursor()
+        transactions, next_cursor = paginate_transactions(query, limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return transactions_response(transactions, next_cursor, sync_cursor)
+
+@api.route('/api/transactions/search', methods=['GET'])
+def search_transactions():
+    try:
+        filters = parse_transaction_filters(request.args)
+        limit = parse_limit(request.args.get('limit'))
+        query = apply_transaction_filters(search_query(request.args.get('q')), filters)
+        transactions, next_cursor = paginate_search(query, limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return transactions_response(transactions, next_cursor)
+
+def transactions_response(transactions, next_cursor, sync_cursor=None):
+    """One page of transactions as JSON, or as an Arrow stream when the client asks for one."""
+    metadata = {'next_cursor': next_cursor}
+    if sync_cursor is not None:
+        metadata['sync_cursor'] = sync_cursor
+    if wants_arrow() and arrow_available():
+        schema = transaction_schema(metadata)
+        batch = transaction_batch([
+            (t.id, t.date, t.amount, t.category, t.description) for t in transactions
+        ], schema)
+        response = Response(stream_batches(schema, [batch]), mimetype=ARROW_STREAM_MIMETYPE)
+        response.vary.add('Accept')
+        return response
+
+    return jsonify({
+        'transactions': [{
+            'id': t.id,
+            'date': t.date,
+            'amount': t.amount,
+            'category': t.category,
+            'description': t.description
+        } for t in transactions],
+        **metadata
+    })
+
+@api.route('/api/transactions/changes', methods=['GET'])
+def transaction_changes():
+    try:
+        page = changes_since(request.args.get('since'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    page['changes'] = [{
+        'id': id_,
+        'date': date,
+        'amount': amount,
+        'category': category,
+        'description': description,
+        'updated_at': updated_at
+    } for id_, date, amount, category, description, updated_at in page['changes']]
+    return jsonify(page)
+
+@api.route('/api/transactions', methods=['POST'])
 def add_transaction():
     try:
         data = request.json
         logging.info(f"Received transaction data: {data}")
 
-        # Input validation
-        if 'amount' not in data or 'category' not in data or 'date' not in data:
-            return jsonify({'error': 'Missing required fields'}), 400
-
-        try:
-            date_obj = datetime.strptime(data['date'], '%Y-%m-%d')
-        except ValueError:
-            try:
-                date_obj = datetime.fromisoformat(data['date'].replace('Z', '+00:00'))
-            except ValueError:
-                date_obj = datetime.utcnow()
-
-        transaction = Transaction(
-            date=date_obj,
-            amount=float(data['amount']),
-            category=data['category'],
-            description=data.get('description', '')
-        )
+        values = transaction_values(data)
+        fill_categories([values])
+        transaction = Transaction(**values)
 
         db.session.add(transaction)
+        update_rollups([(transaction.date, transaction.category, transaction.amount, 1)])
+        bump_data_version()
         db.session.commit()
         return jsonify({'id': transaction.id}), 201
 
@@ -72,24 +144,112 @@ def add_transaction():
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
-@app.route('/api/transactions/<int:transaction_id>', methods=['DELETE'])
+@api.route('/api/transactions/bulk', methods=['POST'])
+def bulk_import_transactions():
+    fmt = request.args.get('format')
+    if fmt is None:
+        fmt = 'ndjson' if 'json' in (request.mimetype or '') else 'csv'
+    if fmt not in RECORD_READERS:
+        return jsonify({'error': f"Unsupported format '{fmt}', expected csv or ndjson"}), 400
+
+    try:
+        summary = import_transactions(request.stream, fmt)
+    except ImportAborted as e:
+        # Earlier batches are already saved; say how many so a retry can skip them
+        logging.error(f"Error importing transactions: {str(e)}")
+        db.session.rollback()
+        return jsonify(dict(e.summary, error=str(e))), 400
+
+    logging.info(f"Bulk import: {summary['inserted']} inserted, {summary['failed']} failed")
+    return jsonify(summary), 201 if summary['inserted'] else 200
+
+@api.route('/api/transactions/export', methods=['GET'])
+def export_transactions():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORTERS:
+        return jsonify({'error': f"Unsupported format '{fmt}', expected csv, ndjson or parquet"}), 400
+    if fmt in ('parquet', 'arrow') and not arrow_available():
+        return jsonify({'error': f'{fmt.capitalize()} export requires pyarrow'}), 501
+    try:
+        filters = parse_transaction_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    body = EXPORTERS[fmt](iter_transaction_batches(filters))
+    return Response(
+        stream_with_context(body),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename=transactions.{fmt}'}
+    )
+
+@api.route('/api/transactions/recategorize', methods=['POST'])
+def recategorize():
+    try:
+        filters = parse_transaction_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        result = recategorize_transactions(filters)
+    except Exception as e:
+        logging.error(f"Error recategorizing transactions: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
+@api.route('/api/transactions', methods=['DELETE'])
+def delete_transactions():
+    data = request.json or {}
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        return jsonify({'error': 'Missing ids list'}), 400
+    if len(ids) > MAX_BULK_DELETE:
+        return jsonify({'error': f'At most {MAX_BULK_DELETE} ids per request'}), 400
+    try:
+        ids = [int(i) for i in ids]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'ids must be integers'}), 400
+
+    try:
+        # One DELETE ... RETURNING both removes the rows and hands back what the rollups need
+        deleted = db.session.execute(
+            delete(Transaction).where(Transaction.id.in_(ids))
+            .returning(Transaction.id, Transaction.date, Transaction.category, Transaction.amount)
+        ).all()
+        update_rollups((date, category, amount, -1) for _, date, category, amount in deleted)
+        record_tombstones(id_ for id_, _, _, _ in deleted)
+        bump_data_version()
+        db.session.commit()
+    except Exception as e:
+        logging.error(f"Error deleting transactions: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'message': 'Transactions deleted', 'deleted': len(deleted)})
+
+@api.route('/api/transactions/<int:transaction_id>', methods=['DELETE'])
 def delete_transaction(transaction_id):
     transaction = Transaction.query.get(transaction_id)
     if transaction:
         db.session.delete(transaction)
+        update_rollups([(transaction.date, transaction.category, transaction.amount, -1)])
+        record_tombstones([transaction_id])
+        bump_data_version()
         db.session.commit()
         return jsonify({'message': 'Transaction deleted'})
     return jsonify({'error': 'Transaction not found'}), 404
 
-@app.route('/api/transactions/<int:transaction_id>', methods=['PUT'])
+@api.route('/api/transactions/<int:transaction_id>', methods=['PUT'])
 def update_transaction(transaction_id):
     transaction = Transaction.query.get(transaction_id)
     if not transaction:
         return jsonify({'error': 'Transaction not found'}), 404
     data = request.json
+    previous = (transaction.date, transaction.category, transaction.amount, -1)
 
     if 'amount' in data:
-        transaction.amount = float(data['amount'])
+        try:
+            transaction.amount = parse_amount(data['amount'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
     if 'category' in data:
         transaction.category = data['category']
     if 'description' in data:
@@ -100,90 +260,397 @@ def update_transaction(transaction_id):
         except ValueError:
             transaction.date = datetime.utcnow()
 
+    update_rollups([previous, (transaction.date, transaction.category, transaction.amount, 1)])
+    bump_data_version()
     db.session.commit()
     return jsonify({'message': 'Transaction updated'})
 
 # Budget Routes
-@app.route('/api/budget', methods=['GET'])
+@api.route('/api/budget', methods=['GET'])
 def get_budget():
-    budget_items = Budget.query.all()
+    """Each category's budget in effect for ?month=YYYY-MM (default: this month).
+
+    `default` is the undated amount, which months without a version fall back to, and
+    `id` the undated row's id for DELETE; both are null for version-only categories.
+    """
+    try:
+        month = parse_month(request.args['month'], 'month') if request.args.get('month') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if month is None:
+        now = datetime.now()
+        month = (now.year, now.month)
+
+    defaults = {b.category: b for b in Budget.query.all()}
     return jsonify([{
-        'id': b.id,
-        'category': b.category,
-        'amount': b.amount
-    } for b in budget_items])
+        'id': defaults[category].id if category in defaults else None,
+        'category': category,
+        'amount': from_paise(amount),
+        'default': defaults[category].amount if category in defaults else None
+    } for category, amount in effective_budgets([month])[month].items()])
 
-@app.route('/api/budget', methods=['POST'])
+@api.route('/api/budget', methods=['POST'])
 def set_budget():
     data = request.json
     if 'budgets' not in data:
         return jsonify({'error': 'Missing budgets list'}), 400
 
     try:
-        for item in data['budgets']:
-            category = item['category']
-            amount = float(item['budget'])
+        rows = parse_budget_items(data['budgets'])
+        if data.get('month'):
+            # A month turns the budgets into versions that apply from that month on
+            year, month = parse_month(data['month'], 'month')
+            upsert_budget_versions(version_rows([f"{year:04d}-{month:02d}"], rows))
+        else:
+            # Without a month the budgets apply to every month, so earlier versions go
+            replace_budgets(rows)
+        bump_data_version()
+        db.session.commit()
+        return jsonify({'message': 'Budgets updated'}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
 
-            budget_item = Budget.query.filter_by(category=category).first()
-            if budget_item:
-                budget_item.amount = amount
-            else:
-                budget_item = Budget(category=category, amount=amount)
-                db.session.add(budget_item)
+@api.route('/api/budget/bulk', methods=['POST'])
+def set_budgets_bulk():
+    data = request.json or {}
+    if 'budgets' not in data:
+        return jsonify({'error': 'Missing budgets list'}), 400
 
+    try:
+        if 'months' in data:
+            months = [parse_month(m, 'months') for m in data['months']]
+        elif 'from' in data and 'to' in data:
+            months = month_range(parse_month(data['from'], 'from'), parse_month(data['to'], 'to'))
+            if not months:
+                return jsonify({'error': "'from' must not be after 'to'"}), 400
+        else:
+            return jsonify({'error': "Missing 'months' list or 'from'/'to' range"}), 400
+        if len(months) > MAX_SUMMARY_MONTHS:
+            return jsonify({'error': f'At most {MAX_SUMMARY_MONTHS} months per request'}), 400
+
+        rows = version_rows([f"{y:04d}-{m:02d}" for y, m in months], parse_budget_items(data['budgets']))
+        upsert_budget_versions(rows)
+        bump_data_version()
         db.session.commit()
-        return jsonify({'message': 'Budgets updated'}), 201
+        return jsonify({'message': 'Budgets updated', 'months': len(months), 'rows': len(rows)}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
-@app.route('/api/budget/<int:budget_id>', methods=['DELETE'])
+@api.route('/api/budget/<int:budget_id>', methods=['DELETE'])
 def delete_budget(budget_id):
     budget_item = Budget.query.get(budget_id)
     if budget_item:
         db.session.delete(budget_item)
+        bump_data_version()
         db.session.commit()
         return jsonify({'message': 'Budget item deleted'})
     return jsonify({'error': 'Budget item not found'}), 404
 
 # Categories Routes
-@app.route('/api/categories', methods=['GET'])
+@api.route('/api/categories', methods=['GET'])
 def get_categories():
     categories = Category.query.all()
     return jsonify([c.name for c in categories])
 
-@app.route('/api/categories', methods=['POST'])
+@api.route('/api/categories', methods=['POST'])
 def add_category():
     data = request.json
     if 'name' not in data:
         return jsonify({'error': 'Missing category name'}), 400
     category = Category(name=data['name'])
     db.session.add(category)
+    bump_data_version()
     db.session.commit()
     return jsonify({'id': category.id}), 201
 
+# Categorization Rules Routes
+@api.route('/api/rules', methods=['GET'])
+def get_rules():
+    rules = CategoryRule.query.order_by(CategoryRule.priority.desc(), CategoryRule.id).all()
+    return jsonify([{
+        'id': r.id,
+        'kind': r.kind,
+        'pattern': r.pattern,
+        'category': r.category,
+        'priority': r.priority
+    } for r in rules])
+
+@api.route('/api/rules', methods=['POST'])
+def add_rules():
+    data = request.json or {}
+    items = data['rules'] if 'rules' in data else [data]
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Missing rules list'}), 400
+    try:
+        rows = parse_rules(items)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    db.session.execute(insert(CategoryRule), rows)
+    db.session.commit()
+    return jsonify({'message': 'Rules added', 'added': len(rows)}), 201
+
+@api.route('/api/rules/<int:rule_id>', methods=['DELETE'])
+def delete_rule(rule_id):
+    rule = db.session.get(CategoryRule, rule_id)
+    if rule:
+        db.session.delete(rule)
+        db.session.commit()
+        return jsonify({'message': 'Rule deleted'})
+    return jsonify({'error': 'Rule not found'}), 404
+
 # Analysis Routes
-@app.route('/api/analysis/budget_summary', methods=['GET'])
+def analysis_response(build, to_arrow, *key_parts):
+    """Serve a cached analysis result as JSON, or as an Arrow stream when the client asks for one."""
+    if wants_arrow() and arrow_available():
+        response = cached_response(
+            lambda: to_arrow(build()), ARROW_STREAM_MIMETYPE, *key_parts, mimetype=ARROW_STREAM_MIMETYPE
+        )
+    else:
+        response = cached_response(lambda: jsonify(build()).get_data(), *key_parts)
+    response.vary.add('Accept')
+    return response
+
+@api.route('/api/analysis/budget_summary', methods=['GET'])
 def budget_summary():
-    return jsonify(calculate_budget_summary())
+    if 'from' in request.args or 'to' in request.args:
+        now = datetime.now()
+        try:
+            end = parse_month(request.args['to'], 'to') if 'to' in request.args else (now.year, now.month)
+            start = parse_month(request.args['from'], 'from') if 'from' in request.args else end
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        months = len(month_range(start, end))
+        if months == 0:
+            return jsonify({'error': "'from' must not be after 'to'"}), 400
+        if months > MAX_SUMMARY_MONTHS:
+            return jsonify({'error': f'At most {MAX_SUMMARY_MONTHS} months per request'}), 400
+        return analysis_response(lambda: calculate_budget_summary_range(start, end), budget_summary_range_bytes)
 
-@app.route('/api/analysis/spending_patterns', methods=['GET'])
+    # The summary covers the current month, so a new month must not reuse last month's entry
+    return analysis_response(calculate_budget_summary, budget_summary_bytes, datetime.now().strftime('%Y-%m'))
+
+@api.route('/api/analysis/spending_patterns', methods=['GET'])
 def spending_patterns():
-    return jsonify(analyze_spending_patterns())
-
-# Initialize database with default categories
-with app.app_context():
-    db.create_all()
-    if Category.query.count() == 0:
-        default_categories = [
-            "Housing", "Transportation", "Food", "Utilities",
-            "Insurance", "Healthcare", "Savings", "Debt",
-            "Personal", "Recreation", "Miscellaneous"
-        ]
-        for category_name in default_categories:
-            db.session.add(Category(name=category_name))
+    try:
+        months = int(request.args.get('months', 6))
+    except ValueError:
+        return jsonify({'error': "Invalid 'months', expected an integer"}), 400
+    if not 1 <= months <= MAX_SUMMARY_MONTHS:
+        return jsonify({'error': f"'months' must be between 1 and {MAX_SUMMARY_MONTHS}"}), 400
+    return analysis_response(
+        lambda: analyze_spending_patterns(months), spending_patterns_bytes, datetime.now().strftime('%Y-%m-%d')
+    )
+
+@api.route('/api/analysis/timeseries', methods=['GET'])
+def timeseries():
+    granularity = request.args.get('granularity', 'month')
+    if granularity not in TIMESERIES_GRANULARITIES:
+        return jsonify({'error': f"Invalid 'granularity', expected one of {', '.join(TIMESERIES_GRANULARITIES)}"}), 400
+    try:
+        end = parse_day(request.args['to'], 'to') if request.args.get('to') else datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = parse_day(request.args['from'], 'from') if request.args.get('from') else end - relativedelta(months=6)
+        window = int(request.args.get('window', 7))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if end.date() == datetime.max.date():
+        # The query runs up to the start of the day after 'to'
+        return jsonify({'error': "'to' is out of range"}), 400
+    if start > end:
+        return jsonify({'error': "'from' must not be after 'to'"}), 400
+    if window < 1:
+        return jsonify({'error': "'window' must be positive"}), 400
+    if bucket_count(granularity, start, end) > MAX_TIMESERIES_BUCKETS:
+        return jsonify({'error': f'At most {MAX_TIMESERIES_BUCKETS} buckets per request'}), 400
+    categories = [c for c in request.args.get('categories', '').split(',') if c]
+
+    return analysis_response(
+        lambda: spending_timeseries(granularity, start, end, categories, window),
+        timeseries_bytes,
+        datetime.now().strftime('%Y-%m-%d')
+    )
+
+@api.route('/api/analysis/forecast', methods=['GET'])
+def forecast():
+    try:
+        months = int(request.args.get('months', 12))
+    except ValueError:
+        return jsonify({'error': "Invalid 'months', expected an integer"}), 400
+    if not 1 <= months <= MAX_SUMMARY_MONTHS:
+        return jsonify({'error': f"'months' must be between 1 and {MAX_SUMMARY_MONTHS}"}), 400
+    # Spent-so-far and the scenarios both depend on today's date
+    return analysis_response(lambda: spending_forecast(months), forecast_bytes, datetime.now().strftime('%Y-%m-%d'))
+
+# Report Routes
+@api.route('/api/reports', methods=['POST'])
+def submit_report():
+    try:
+        kind, params = parse_report_request(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    job = create_report_job(kind, params, current_app.config['REPORT_TTL_SECONDS'])
+    try:
+        current_app.extensions['report_executor'].submit(
+            run_report_job, current_app._get_current_object(), g.account, job.id
+        )
+    except QueueFull as e:
+        db.session.delete(job)
         db.session.commit()
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
 
-if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    response = jsonify({'id': job.id, 'status': job.status})
+    response.headers['Location'] = f'/api/reports/{job.id}'
+    return response, 202
+
+@api.route('/api/reports/<job_id>', methods=['GET'])
+def report_status(job_id):
+    job = get_report_job(job_id, current_app.config['REPORT_STALE_SECONDS'])
+    if job is None:
+        return jsonify({'error': 'Report not found or expired'}), 404
+    return jsonify(report_job_dict(job))
+
+# Accounts Routes
+@api.route('/api/accounts', methods=['POST'])
+def create_account():
+    """Create an account's database. The only way, besides `flask init-db`, to add one."""
+    data = request.get_json(silent=True) or {}
+    if not data.get('account'):
+        return jsonify({'error': "Missing 'account'"}), 400
+    try:
+        account = parse_account(data['account'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
+    # A fresh app context, so the new database is set up in its own session
+    with current_app.app_context():
+        g.account = account
+        created = current_app.extensions['shard_router'].create(account, init_database)
+    if not created:
+        return jsonify({'error': f'Account {account!r} already exists'}), 409
+    return jsonify({'account': account}), 201
+
+@api.route('/api/accounts/<account>', methods=['GET'])
+def account_status(account):
+    try:
+        account = parse_account(account)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not current_app.extensions['shard_router'].exists(account):
+        return jsonify({'error': f'Unknown account {account!r}'}), 404
+    return jsonify({'account': account})
+
+def use_account(account):
+    """Point the CLI's app context at an existing account, or fail the command."""
+    try:
+        g.account = parse_account(account)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--account')
+    if not current_app.extensions['shard_router'].exists(g.account):
+        raise click.ClickException(f"Unknown account {g.account!r}; create it with init-db --account {g.account}")
+
+@api.cli.command('rebuild-rollups')
+@click.option('--account', default=DEFAULT_ACCOUNT, help='account whose database to use')
+def rebuild_rollups_command(account):
+    """Recompute the monthly rollup table from all transactions."""
+    use_account(account)
+    rebuild_rollups()
+    print(f"Rebuilt {MonthlyRollup.query.count()} rollup rows")
+
+@api.cli.command('init-db')
+@click.option('--account', default=DEFAULT_ACCOUNT, help='account whose database to use (created if new)')
+def init_db_command(account):
+    """Create missing tables, apply migrations and seed the default categories."""
+    try:
+        g.account = parse_account(account)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--account')
+    if current_app.extensions['shard_router'].create(g.account, init_database):
+        print(f"Created account {g.account!r}")
+    version = init_database()
+    print(f"Database is at schema version {version}")
+
+def default_config():
+    return {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.environ.get('SAVEEAZY_DB_PATH', os.path.join(basedir, 'finance.db')),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'SQLITE_PRAGMAS': {
+            'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+            'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 268435456)),
+            'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -65536))
+        },
+        'SLOW_QUERY_MS': float(os.environ.get('SLOW_QUERY_MS', 200)),
+        # Run init_database() in front of the first request each process serves. Turn it
+        # off when `flask init-db` (or gunicorn's on_starting hook) has already run it.
+        # Other accounts' databases are always brought up to date on first use.
+        'INIT_DB_ON_FIRST_REQUEST': os.environ.get('INIT_DB_ON_FIRST_REQUEST', '1') == '1',
+        'ACCOUNTS_DIR': os.environ.get('SAVEEAZY_ACCOUNTS_DIR', os.path.join(basedir, 'accounts')),
+        'MAX_OPEN_SHARDS': int(os.environ.get('MAX_OPEN_SHARDS', 64)),
+        # Background reports: worker threads per process, queued-or-running jobs before
+        # POST /api/reports answers 503, how long finished results are kept and how long
+        # a job may stay queued or running before it is given up as failed
+        'REPORT_WORKERS': int(os.environ.get('REPORT_WORKERS', 2)),
+        'REPORT_MAX_PENDING': int(os.environ.get('REPORT_MAX_PENDING', 16)),
+        'REPORT_TTL_SECONDS': int(os.environ.get('REPORT_TTL_SECONDS', 3600)),
+        'REPORT_STALE_SECONDS': int(os.environ.get('REPORT_STALE_SECONDS', 600))
+    }
+
+# Routes that manage accounts themselves and ignore the account header
+ACCOUNT_ROUTES = {'api.create_account', 'api.account_status'}
+
+def bind_accounts(app, router):
+    """Pick the account for each request and make sure its database is initialized."""
+    if not app.config['INIT_DB_ON_FIRST_REQUEST']:
+        router.mark_ready(DEFAULT_ACCOUNT)
+
+    @app.before_request
+    def select_account():
+        try:
+            g.account = parse_account(request.headers.get(ACCOUNT_HEADER))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if request.endpoint in ACCOUNT_ROUTES:
+            g.account = DEFAULT_ACCOUNT
+            return
+        if not router.exists(g.account):
+            return jsonify({'error': f'Unknown account {g.account!r}'}), 404
+        # Migrations run once per process, in case the file predates this version
+        router.ensure_ready(g.account, init_database)
+
+def create_app(config=None):
+    """Build the Flask app. Nothing touches the database until it is first needed."""
+    app = Flask(__name__)
+    app.config.update(default_config())
+    app.config.update(config or {})
+    app.json = FastJSONProvider(app)
+    # Registered before compression so the recorded latency includes compressing the body
+    init_metrics(app)
+    init_compression(app)
+    init_response_cache(app)
+    # CORS(app, resources={r"/api/*": {"origins": "http://localhost:8501"}})  # Restrict in production
+    CORS(app)  # Allow all origins for development
+
+    db.init_app(app)
+    with app.app_context():
+        # Only registers a connect hook; no connection is opened here
+        configure_sqlite(db.engine, app.config['SQLITE_PRAGMAS'])
+    router = ShardRouter(
+        app.config['ACCOUNTS_DIR'],
+        pragmas=app.config['SQLITE_PRAGMAS'],
+        engine_options=app.config.get('SQLALCHEMY_ENGINE_OPTIONS'),
+        max_open=app.config['MAX_OPEN_SHARDS']
+    )
+    app.extensions['shard_router'] = router
+    bind_accounts(app, router)
+    app.extensions['report_executor'] = ReportExecutor(app.config['REPORT_WORKERS'], app.config['REPORT_MAX_PENDING'])
+    app.register_blueprint(api)
+    return app
+
+app = create_app()
+
+if __name__ == '__main__':
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
+    app.run(debug=os.environ.get('FLASK_DEBUG', '1') == '1', port=int(os.environ.get('PORT', 5000)), threaded=True)
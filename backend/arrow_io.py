@@ -0,0 +1,186 @@
+# backend/arrow_io.py
+#
+# Arrow IPC stream responses for clients that send
+# Accept: application/vnd.apache.arrow.stream. pyarrow is imported inside each
+# function so JSON-only processes never pay for loading it.
+
+import json
+from flask import request
+
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+TIMESERIES_CATEGORY_PREFIX = 'category:'
+
+
+def wants_arrow():
+    """True when the client prefers an Arrow stream over JSON."""
+    best = request.accept_mimetypes.best_match(['application/json', ARROW_STREAM_MIMETYPE])
+    return best == ARROW_STREAM_MIMETYPE
+
+
+def arrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def transaction_schema(metadata=None):
+    import pyarrow as pa
+    return pa.schema([
+        ('id', pa.int64()),
+        ('date', pa.timestamp('us')),
+        ('amount', pa.float64()),
+        ('category', pa.string()),
+        ('description', pa.string())
+    ], metadata=_encode_metadata(metadata))
+
+
+def transaction_batch(rows, schema):
+    """Build a record batch from (id, date, amount, category, description) tuples."""
+    import pyarrow as pa
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+def _encode_metadata(metadata):
+    if not metadata:
+        return None
+    return {key: json.dumps(value) for key, value in metadata.items()}
+
+
+class ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_batches(schema, batches):
+    """Yield an Arrow IPC stream chunk by chunk, one record batch at a time."""
+    import pyarrow as pa
+    sink = ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    yield sink.drain()
+    for batch in batches:
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def table_bytes(columns, types, metadata=None):
+    """Serialize a small column dict to a complete Arrow IPC stream."""
+    import pyarrow as pa
+    schema = pa.schema([(name, types[name]) for name in columns], metadata=_encode_metadata(metadata))
+    table = pa.Table.from_pydict(columns, schema=schema)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# --------------------- Analysis results as tables ---------------------
+
+def budget_summary_bytes(summary):
+    """One row per category; the month and totals ride along as schema metadata."""
+    import pyarrow as pa
+    categories = summary['categories']
+    columns = {name: [c[name] for c in categories] for name in ('category', 'budget', 'spent', 'remaining', 'percent_used')}
+    types = {'category': pa.string(), 'budget': pa.float64(), 'spent': pa.float64(),
+             'remaining': pa.float64(), 'percent_used': pa.float64()}
+    metadata = {key: value for key, value in summary.items() if key != 'categories'}
+    return table_bytes(columns, types, metadata)
+
+
+def budget_summary_range_bytes(result):
+    """One row per (month, category) across the range; range totals as metadata."""
+    import pyarrow as pa
+    columns = {'month': [], 'category': [], 'budget': [], 'spent': [], 'remaining': [], 'percent_used': []}
+    for month_index, summary in enumerate(result['months']):
+        month_key = _month_key(result['from'], month_index)
+        for c in summary['categories']:
+            columns['month'].append(month_key)
+            for name in ('category', 'budget', 'spent', 'remaining', 'percent_used'):
+                columns[name].append(c[name])
+    types = {'month': pa.string(), 'category': pa.string(), 'budget': pa.float64(), 'spent': pa.float64(),
+             'remaining': pa.float64(), 'percent_used': pa.float64()}
+    metadata = {key: value for key, value in result.items() if key != 'months'}
+    return table_bytes(columns, types, metadata)
+
+
+def _month_key(start, offset):
+    year, month = (int(part) for part in start.split('-'))
+    total = year * 12 + (month - 1) + offset
+    return f"{total // 12:04d}-{total % 12 + 1:02d}"
+
+
+def spending_patterns_bytes(result):
+    """Long format: one row per (month, category) with that month's spending."""
+    import pyarrow as pa
+    categories = [c['category'] for c in result['by_category']]
+    columns = {'month': [], 'category': [], 'spending': []}
+    for entry in result['by_date']:
+        for category, amount in zip(categories, entry['spending']):
+            columns['month'].append(entry['month'])
+            columns['category'].append(category)
+            columns['spending'].append(amount)
+    types = {'month': pa.string(), 'category': pa.string(), 'spending': pa.float64()}
+    return table_bytes(columns, types)
+
+
+def timeseries_bytes(result):
+    """One row per bucket: a date column, one float column per category, then the stats.
+
+    Category names are free text, so each category column is named with the
+    TIMESERIES_CATEGORY_PREFIX in front; no category can then replace the 'bucket'
+    column or one of the '_' stats columns.
+    """
+    import numpy as np
+    import pyarrow as pa
+    columns = {'bucket': np.array(result['buckets'], dtype='datetime64[s]')}
+    types = {'bucket': pa.timestamp('s')}
+    for name, values in result['series'].items():
+        columns[TIMESERIES_CATEGORY_PREFIX + name] = values
+        types[TIMESERIES_CATEGORY_PREFIX + name] = pa.float64()
+    for name in ('total', 'cumulative', 'rolling_mean'):
+        columns[f'_{name}'] = result[name]
+        types[f'_{name}'] = pa.float64()
+    metadata = {key: result[key] for key in ('granularity', 'from', 'to', 'window')}
+    metadata['category_prefix'] = TIMESERIES_CATEGORY_PREFIX
+    return table_bytes(columns, types, metadata)
+
+
+def forecast_bytes(result):
+    """One row per category; the month, day and totals ride along as schema metadata."""
+    import pyarrow as pa
+    names = ('category', 'budget', 'spent', 'projected', 'projected_low', 'projected_high', 'overrun_probability')
+    columns = {name: [c[name] for c in result['categories']] for name in names}
+    types = {name: pa.float64() for name in names}
+    types['category'] = pa.string()
+    metadata = {key: value for key, value in result.items() if key != 'categories'}
+    return table_bytes(columns, types, metadata)
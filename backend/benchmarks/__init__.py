@@ -0,0 +1,7 @@
+# backend/benchmarks
+#
+# Stand-alone performance checks. Run them from the backend directory, e.g.
+#   python -m benchmarks.serialization
+#   python -m benchmarks.generate --transactions 100000 --months 24
+#   python -m benchmarks.harness --sizes 10000 100000 1000000
+#   python -m benchmarks.startup
@@ -0,0 +1,132 @@
+# backend/benchmarks/generate.py
+#
+# Fills a database with seeded, realistic-looking data: N transactions spread over the
+# last M months across the default categories, plus a budget version for every
+# category in each of those months. The same seed always produces the same data.
+#
+#   python -m benchmarks.generate [--transactions 100000] [--months 24] [--seed 42] [--reset]
+#
+# Writes to finance.db unless SAVEEAZY_DB_PATH points somewhere else.
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert
+from models import (
+    db, DEFAULT_CATEGORIES, Transaction, TransactionTombstone, MonthlyRollup, Budget, BudgetVersion
+)
+from budgets import upsert_budgets, upsert_budget_versions, version_rows
+from rollups import rebuild_rollups
+from cache import bump_data_version
+
+BATCH_SIZE = 10000
+
+# Typical (low, high) amount in INR and how often each default category shows up
+CATEGORY_PROFILES = {
+    "Housing": ((8000, 35000), 1),
+    "Transportation": ((50, 2500), 12),
+    "Food": ((80, 3000), 30),
+    "Utilities": ((300, 6000), 4),
+    "Insurance": ((1000, 15000), 1),
+    "Healthcare": ((200, 12000), 3),
+    "Savings": ((1000, 25000), 2),
+    "Debt": ((2000, 30000), 2),
+    "Personal": ((100, 5000), 10),
+    "Recreation": ((150, 6000), 8),
+    "Miscellaneous": ((20, 2000), 7),
+}
+MERCHANTS = ["Swiggy", "Zomato", "Uber", "Ola", "BigBasket", "Amazon", "Flipkart", "BESCOM",
+             "Airtel", "Jio", "Apollo Pharmacy", "PVR", "BookMyShow", "IRCTC", "Indian Oil",
+             "DMart", "Myntra", "Zepto", "Blinkit", "HDFC EMI", "LIC Premium", "Rent"]
+
+
+def month_starts(months, today=None):
+    """The first day of each of the last `months` months, oldest first, ending this month."""
+    today = today or datetime.now()
+    total = today.year * 12 + today.month - 1
+    return [datetime(m // 12, m % 12 + 1, 1) for m in range(total - months + 1, total + 1)]
+
+
+def transaction_rows(count, months, seed):
+    """Yield batches of transaction column values."""
+    rng = random.Random(seed)
+    categories = DEFAULT_CATEGORIES
+    weights = [CATEGORY_PROFILES[c][1] for c in categories]
+    start = month_starts(months)[0]
+    span = (datetime.now() - start).total_seconds()
+    now = datetime.utcnow()
+
+    batch = []
+    for _ in range(count):
+        category = rng.choices(categories, weights)[0]
+        low, high = CATEGORY_PROFILES[category][0]
+        date = start + timedelta(seconds=rng.random() * span)
+        batch.append({
+            'date': date.replace(hour=0, minute=0, second=0, microsecond=0),
+            'amount': round(rng.uniform(low, high), 2),
+            'category': category,
+            'description': f"{rng.choice(MERCHANTS)} {rng.choice(['UPI', 'POS', 'NEFT', 'CARD'])} {rng.randrange(10 ** 6):06d}",
+            'created_at': now,
+            'updated_at': now
+        })
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def budget_rows(seed):
+    """A monthly budget per category, scaled by how often the generator picks it."""
+    rng = random.Random(seed)
+    rows = []
+    for category in DEFAULT_CATEGORIES:
+        (low, high), weight = CATEGORY_PROFILES[category]
+        rows.append({'category': category, 'amount': float(round((low + high) / 2 * weight * rng.uniform(0.5, 1.5), -2))})
+    return rows
+
+
+def reset_data():
+    for model in (Transaction, TransactionTombstone, MonthlyRollup, Budget, BudgetVersion):
+        db.session.execute(delete(model))
+    db.session.commit()
+
+
+def generate(transactions, months, seed=42):
+    """Insert the transactions and budgets, then rebuild the rollups. Returns seconds taken."""
+    started = time.perf_counter()
+    for batch in transaction_rows(transactions, months, seed):
+        db.session.execute(insert(Transaction), batch)
+        db.session.commit()
+
+    budgets = budget_rows(seed)
+    upsert_budgets(budgets)
+    upsert_budget_versions(version_rows([m.strftime('%Y-%m') for m in month_starts(months)], budgets))
+    bump_data_version()
+    db.session.commit()
+    rebuild_rollups()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill the database with seeded benchmark data.')
+    parser.add_argument('--transactions', type=int, default=100000)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='delete existing transactions and budgets first')
+    args = parser.parse_args()
+
+    from app import app
+    from migrations import init_database
+    with app.app_context():
+        init_database()
+        if args.reset:
+            reset_data()
+        elapsed = generate(args.transactions, args.months, args.seed)
+        print(f"Generated {args.transactions:,} transactions over {args.months} months "
+              f"into {db.engine.url.database} in {elapsed:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+# backend/benchmarks/harness.py
+#
+# Endpoint benchmarks at several database sizes. Each size runs in its own process
+# against its own generated database (kept in --data-dir and reused on later runs), so
+# peak RSS is per size and finance.db is never touched. Requests go through Flask's
+# test client: the numbers cover routing, queries and serialization, not the network.
+#
+#   python -m benchmarks.harness [--sizes 10000 100000 1000000] [--requests 200]
+#                                [--save results.json] [--compare baseline.json]
+#
+# Analysis routes are measured twice: "cold" clears the response cache before every
+# request, "cached" serves repeated requests from it. With --compare, any p95 more
+# than --tolerance slower than the baseline fails the run with exit code 1.
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# (name, path, clear the response cache before each request)
+SCENARIOS = [
+    ('transactions first page', '/api/transactions?limit=100', False),
+    ('transactions filtered', '/api/transactions?limit=100&category=Food,Transportation&from={from_90d}', False),
+    ('transactions second page', '/api/transactions?limit=100&cursor={cursor}', False),
+    ('budget_summary cold', '/api/analysis/budget_summary', True),
+    ('budget_summary cached', '/api/analysis/budget_summary', False),
+    ('budget_summary 12 months cold', '/api/analysis/budget_summary?from={from_12m}', True),
+    ('spending_patterns cold', '/api/analysis/spending_patterns', True),
+    ('spending_patterns cached', '/api/analysis/spending_patterns', False),
+]
+WARMUP = 3
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def run_size(size, requests):
+    """Benchmark one database size in this process and return its results."""
+    from datetime import datetime, timedelta
+    from app import app
+    from models import db, Transaction
+
+    client = app.test_client()
+    with app.app_context():
+        found = db.session.query(Transaction.id).count()
+        if found != size:
+            raise RuntimeError(f"{db.engine.url.database} holds {found} transactions, expected {size}; "
+                               "delete it to regenerate")
+
+    first_page = client.get('/api/transactions?limit=100').get_json()
+    today = datetime.now()
+    values = {
+        'cursor': first_page['next_cursor'] or '',
+        'from_90d': (today - timedelta(days=90)).strftime('%Y-%m-%d'),
+        'from_12m': f"{today.year - 1:04d}-{today.month:02d}"
+    }
+
+    def timed_get(path, cold):
+        if cold:
+            app.extensions['response_cache'].clear()
+        started = time.perf_counter()
+        response = client.get(path)
+        elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        return elapsed
+
+    results = []
+    for name, path, cold in SCENARIOS:
+        path = path.format(**values)
+        for _ in range(WARMUP):
+            timed_get(path, cold)
+        started = time.perf_counter()
+        samples = [timed_get(path, cold) for _ in range(requests)]
+        results.append({
+            'scenario': name,
+            'p50_ms': percentile(samples, 50) * 1000,
+            'p95_ms': percentile(samples, 95) * 1000,
+            'p99_ms': percentile(samples, 99) * 1000,
+            'mean_ms': statistics.fmean(samples) * 1000,
+            'throughput_rps': len(samples) / (time.perf_counter() - started)
+        })
+    return {'size': size, 'peak_rss_mb': peak_rss_mb(), 'results': results}
+
+
+def run_in_subprocess(size, args):
+    path = os.path.join(args.data_dir, f'bench-{size}-{args.months}m-seed{args.seed}.db')
+    env = dict(os.environ, SAVEEAZY_DB_PATH=path)
+    if not os.path.exists(path):
+        # Generate separately so the benchmark process's peak RSS only covers serving
+        subprocess.run([sys.executable, '-m', 'benchmarks.generate', '--transactions', str(size),
+                        '--months', str(args.months), '--seed', str(args.seed)], env=env, check=True)
+    command = [sys.executable, '-m', 'benchmarks.harness', '--single', str(size), '--requests', str(args.requests)]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def print_report(report):
+    print(f"\n{report['size']:,} transactions, peak RSS {report['peak_rss_mb']:.0f} MB")
+    print(f"{'scenario':<32}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}")
+    for r in report['results']:
+        print(f"{r['scenario']:<32}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['throughput_rps']:>9.0f}")
+
+
+def regressions(reports, baseline, tolerance):
+    """Scenarios whose p95 grew by more than `tolerance` compared to the baseline."""
+    previous = {(b['size'], r['scenario']): r for b in baseline for r in b['results']}
+    found = []
+    for report in reports:
+        for r in report['results']:
+            before = previous.get((report['size'], r['scenario']))
+            if before and r['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+                found.append(f"{report['size']:,} / {r['scenario']}: p95 {before['p95_ms']:.2f} -> {r['p95_ms']:.2f} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the API at several database sizes.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per scenario')
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'saveeazy-bench'))
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON from an earlier --save')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 slowdown, 0.25 = 25%%')
+    parser.add_argument('--single', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        # Child process: SAVEEAZY_DB_PATH is already set, report as one JSON line
+        print(json.dumps(run_size(args.single, args.requests)))
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    reports = []
+    for size in args.sizes:
+        report = run_in_subprocess(size, args)
+        print_report(report)
+        reports.append(report)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(reports, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            found = regressions(reports, json.load(f), args.tolerance)
+        if found:
+            print('\nRegressions:\n  ' + '\n  '.join(found))
+            sys.exit(1)
+        print('\nNo regressions against the baseline.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# backend/benchmarks/serialization.py
+#
+# Compares serializing a large transaction listing with Flask's default JSON provider
+# (the old code path, calling isoformat() per row) against FastJSONProvider, and the
+# bytes on the wire with and without gzip/brotli.
+#
+#   python -m benchmarks.serialization [--rows 100000] [--repeat 5]
+
+import argparse
+import gzip
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from json_provider import FastJSONProvider, orjson
+from models import DEFAULT_CATEGORIES
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def make_rows(count, seed=42):
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    return [(
+        i + 1,
+        start + timedelta(days=rng.randrange(2000)),
+        round(rng.uniform(10, 5000), 2),
+        rng.choice(DEFAULT_CATEGORIES),
+        f"Payment {rng.randrange(100000)}"
+    ) for i in range(count)]
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+
+    def default_listing():
+        return default_provider.dumps({'transactions': [{
+            'id': id_, 'date': date.isoformat(), 'amount': amount,
+            'category': category, 'description': description
+        } for id_, date, amount, category, description in rows], 'next_cursor': None}).encode()
+
+    def fast_listing():
+        return fast_provider.dumps({'transactions': [{
+            'id': id_, 'date': date, 'amount': amount,
+            'category': category, 'description': description
+        } for id_, date, amount, category, description in rows], 'next_cursor': None}).encode()
+
+    print(f"{args.rows} rows, median of {args.repeat} runs (orjson {'on' if orjson else 'off'})")
+    print(f"{'step':<34}{'ms':>10}{'bytes':>14}")
+    default_time, default_body = timed(default_listing, args.repeat)
+    print(f"{'default provider + isoformat':<34}{default_time * 1000:>10.1f}{len(default_body):>14,}")
+    fast_time, fast_body = timed(fast_listing, args.repeat)
+    print(f"{'FastJSONProvider':<34}{fast_time * 1000:>10.1f}{len(fast_body):>14,}")
+
+    gzip_time, gzip_body = timed(lambda: gzip.compress(fast_body, compresslevel=6), args.repeat)
+    print(f"{'  + gzip (level 6)':<34}{(fast_time + gzip_time) * 1000:>10.1f}{len(gzip_body):>14,}")
+    if brotli is not None:
+        br_time, br_body = timed(lambda: brotli.compress(fast_body, quality=4), args.repeat)
+        print(f"{'  + brotli (quality 4)':<34}{(fast_time + br_time) * 1000:>10.1f}{len(br_body):>14,}")
+    else:
+        print("  brotli not installed, skipped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# backend/benchmarks/startup.py
+#
+# Cold-start cost: how long a fresh Python process takes from launch to importing the
+# app, and to answering its first request. Runs each case in new processes against a
+# throwaway database, first with an empty database (schema created and seeded on the
+# first request) and then with one that is already current.
+#
+#   python -m benchmarks.startup [--runs 5] [--path /api/categories]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+from app import app
+imported = time.perf_counter()
+response = app.test_client().get({path!r})
+assert response.status_code == 200, response.status_code
+print(json.dumps({{'import': imported - started, 'first_response': time.perf_counter() - started}}))
+"""
+
+
+def measure(path, env):
+    launched = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', CHILD.format(path=path)], env=env,
+                            check=True, capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process'] = time.perf_counter() - launched
+    return result
+
+
+def report(name, samples):
+    print(f"{name:<22}" + ''.join(
+        f"{statistics.median(s[key] for s in samples) * 1000:>16.0f}" for key in ('import', 'first_response', 'process')
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import-to-first-response time.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/api/categories')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, SAVEEAZY_DB_PATH=os.path.join(tmp, 'startup.db'))
+        empty = []
+        for run in range(args.runs):
+            for name in os.listdir(tmp):
+                os.remove(os.path.join(tmp, name))
+            empty.append(measure(args.path, env))
+        current = [measure(args.path, env) for _ in range(args.runs)]
+
+    print(f"median of {args.runs} runs, ms")
+    print(f"{'database':<22}{'import':>16}{'first response':>16}{'whole process':>16}")
+    report('empty', empty)
+    report('already current', current)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# backend/budgets.py
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import db, Budget, BudgetVersion
+from validation import parse_amount
+
+UPSERT_BATCH_SIZE = 1000
+
+
+def parse_budget_items(items):
+    """Turn the [{'category', 'budget'}, ...] payload into column values, last entry per category wins."""
+    rows = {}
+    for item in items:
+        category = item['category']
+        rows[category] = {'category': category, 'amount': parse_amount(item['budget'])}
+    return list(rows.values())
+
+
+def upsert_budgets(rows):
+    """Insert or update every budget row with a single INSERT ... ON CONFLICT statement."""
+    if not rows:
+        return
+    stmt = sqlite_insert(Budget).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Budget.category],
+        set_={'amount': stmt.excluded.amount}
+    )
+    db.session.execute(stmt)
+
+
+def replace_budgets(rows):
+    """Set undated budgets that apply to every month, dropping the categories' versions."""
+    upsert_budgets(rows)
+    categories = [row['category'] for row in rows]
+    for start in range(0, len(categories), UPSERT_BATCH_SIZE):
+        db.session.execute(delete(BudgetVersion).where(
+            BudgetVersion.category.in_(categories[start:start + UPSERT_BATCH_SIZE])
+        ))
+
+
+def upsert_budget_versions(rows):
+    """Insert or update per-month budget versions, one multi-row statement per batch."""
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        stmt = sqlite_insert(BudgetVersion).values(rows[start:start + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BudgetVersion.category, BudgetVersion.month],
+            set_={'amount': stmt.excluded.amount}
+        )
+        db.session.execute(stmt)
+
+
+def version_rows(months, budget_rows):
+    """Expand category budgets over a list of YYYY-MM months into budget version rows."""
+    return [dict(row, month=month) for month in months for row in budget_rows]
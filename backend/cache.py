@@ -0,0 +1,81 @@
+# backend/cache.py
+
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import current_app, request
+from sqlalchemy import update
+from models import db, DataVersion
+from sharding import ACCOUNT_HEADER, current_account
+
+
+def bump_data_version():
+    """Mark the data as changed. Call inside the write's session so it commits with it."""
+    db.session.execute(update(DataVersion).where(DataVersion.id == 1).values(version=DataVersion.version + 1))
+
+
+def current_data_version():
+    """(database token, version). The token is random per database file, so a file that
+    is replaced or recreated, whose version starts over, never matches older entries."""
+    row = db.session.query(DataVersion.token, DataVersion.version).filter(DataVersion.id == 1).first()
+    return tuple(row) if row is not None else (None, 0)
+
+
+class ResponseCache:
+    """Small thread-safe LRU of rendered response bodies."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def init_response_cache(app, max_entries=256):
+    """Give each app its own cache, so apps in one process never serve each other's bodies."""
+    app.extensions['response_cache'] = ResponseCache(max_entries)
+
+
+def cached_response(build_body, *key_parts, mimetype='application/json'):
+    """Serve a body built by `build_body` from cache until the data version changes.
+
+    The cache key is the account, the request path and query string, that account's
+    database token and data version and any extra `key_parts` the body depends on (e.g.
+    the current month). Responses carry a strong ETag and become 304 Not Modified when
+    it matches If-None-Match.
+    """
+    key = (
+        current_account(), request.path, tuple(sorted(request.args.items(multi=True))), current_data_version()
+    ) + key_parts
+    response_cache = current_app.extensions['response_cache']
+    entry = response_cache.get(key)
+    if entry is None:
+        body = build_body()
+        if isinstance(body, str):
+            body = body.encode()
+        entry = (body, hashlib.sha1(body).hexdigest())
+        response_cache.set(key, entry)
+
+    body, etag = entry
+    response = current_app.response_class(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    response.vary.add(ACCOUNT_HEADER)
+    return response.make_conditional(request)
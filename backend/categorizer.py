@@ -0,0 +1,316 @@
+# backend/categorizer.py
+#
+# Rule-based categorization. Every rule is compiled into one Matcher: keyword rules go
+# into an Aho-Corasick automaton, which finds all of them in a single pass over the
+# text however many there are. Regex rules are filtered the same way: each one carries
+# literals one of which every match must contain, a second automaton finds which of
+# them occur, and only those regexes run. The compiled matcher is cached per process
+# and rebuilt only when the rule set changes.
+
+import re
+import threading
+try:
+    from re import _parser as regex_parser
+except ImportError:  # Python < 3.11
+    import sre_parse as regex_parser
+from collections import deque
+from datetime import datetime
+from sqlalchemy import func, update
+from models import db, Category, CategoryRule, Transaction
+from queries import apply_transaction_filters
+from rollups import update_rollups
+from cache import bump_data_version
+from sharding import current_account
+
+RULE_KINDS = ('keyword', 'regex')
+FALLBACK_CATEGORY = 'Miscellaneous'
+RECATEGORIZE_BATCH_SIZE = 5000
+MIN_REGEX_LITERAL = 3
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over (keyword, rank) pairs; best() returns the lowest rank found."""
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._rank = [None]
+        self._ends = [[]]
+        self._output = [0]
+        for word, rank in keywords:
+            node = 0
+            for char in word:
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][char] = child
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._rank.append(None)
+                    self._ends.append([])
+                    self._output.append(0)
+                node = child
+            self._rank[node] = _lowest(self._rank[node], rank)
+            self._ends[node].append(rank)
+
+        # Breadth-first, so a node's fail target is always finished before the node itself
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                # A keyword ending at the fail target also ends here
+                self._rank[child] = _lowest(self._rank[child], self._rank[self._fail[child]])
+                # Nearest node down the fail chain where a keyword ends, for found()
+                target = self._fail[child]
+                self._output[child] = target if self._ends[target] else self._output[target]
+
+    def best(self, text):
+        goto, fail, ranks = self._goto, self._fail, self._rank
+        node = 0
+        best = None
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if ranks[node] is not None:
+                best = _lowest(best, ranks[node])
+                if best == 0:
+                    break
+        return best
+
+    def found(self, text):
+        """The ranks of every keyword that occurs in `text`."""
+        goto, fail, ranks, ends, output = self._goto, self._fail, self._rank, self._ends, self._output
+        node = 0
+        found = set()
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if ranks[node] is not None:
+                hit = node if ends[node] else output[node]
+                while hit:
+                    found.update(ends[hit])
+                    hit = output[hit]
+        return found
+
+
+def _lowest(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a, b)
+
+
+def required_literals(pattern):
+    """Casefolded ASCII literals such that every match of `pattern` contains one of them.
+
+    Empty when no such set was found. The set with the longest shortest literal wins.
+    Only ASCII is used because any character IGNORECASE matches against an ASCII letter
+    casefolds to that letter (after _literal_fold), so looking for a casefolded literal
+    in the folded text never misses a match.
+    """
+    try:
+        parsed = regex_parser.parse(pattern, re.IGNORECASE | re.DOTALL)
+    except re.error:
+        return []
+    return [literal.casefold() for literal in _required_literals(parsed)]
+
+
+def _required_literals(items):
+    best, run = [], ''
+    for op, arg in items:
+        if op is regex_parser.LITERAL and arg < 128:
+            run += chr(arg)
+            continue
+        if run:
+            best = _longer(best, [run])
+            run = ''
+        if op is regex_parser.SUBPATTERN:
+            best = _longer(best, _required_literals(arg[-1]))
+        elif op in (regex_parser.MAX_REPEAT, regex_parser.MIN_REPEAT) and arg[0] >= 1:
+            best = _longer(best, _required_literals(arg[2]))
+        elif op is regex_parser.BRANCH:
+            options = [_required_literals(branch) for branch in arg[1]]
+            if all(options):
+                best = _longer(best, [literal for option in options for literal in option])
+    return _longer(best, [run]) if run else best
+
+
+def _literal_fold(folded):
+    """Casefolded text as searched for regex literals."""
+    if folded.isascii():
+        return folded
+    # IGNORECASE matches 'i' against dotted and dotless capital I, which casefold to
+    # 'i' plus a combining dot and to 'ı'
+    return folded.replace('i\u0307', 'i').replace('\u0131', 'i')
+
+
+def _shortest(literals):
+    return min(map(len, literals)) if literals else 0
+
+
+def _longer(a, b):
+    return b if _shortest(b) > _shortest(a) else a
+
+
+class Matcher:
+    """All rules compiled together. Rules rank by priority (highest first), then by id."""
+
+    def __init__(self, rules):
+        rules = sorted(rules, key=lambda r: (-r.priority, r.id))
+        self.categories = [r.category for r in rules]
+        self.keywords = KeywordAutomaton(
+            (r.pattern.casefold(), rank) for rank, r in enumerate(rules) if r.kind == 'keyword'
+        )
+        self.regexes = {}
+        literals = []
+        self._unfiltered = set()
+        for rank, r in enumerate(rules):
+            if r.kind != 'regex':
+                continue
+            self.regexes[rank] = re.compile(r.pattern, re.IGNORECASE | re.DOTALL)
+            required = required_literals(r.pattern)
+            literals += [(literal, rank) for literal in required]
+            if not required:
+                # Saved before literals were required; these run on every text
+                self._unfiltered.add(rank)
+        self.regex_literals = KeywordAutomaton(literals)
+        self._first_regex_rank = min(self.regexes) if self.regexes else None
+
+    def match(self, text):
+        """Category of the best rule matching `text`, or None."""
+        if not text:
+            return None
+        folded = text.casefold()
+        best = self.keywords.best(folded)
+        if self._first_regex_rank is not None and (best is None or self._first_regex_rank < best):
+            # Try the regexes whose literal occurs, best-ranked first, until one matches
+            for rank in sorted(self.regex_literals.found(_literal_fold(folded)) | self._unfiltered):
+                if best is not None and rank > best:
+                    break
+                if self.regexes[rank].search(text):
+                    best = rank
+                    break
+        return self.categories[best] if best is not None else None
+
+
+_matcher_lock = threading.Lock()
+_matcher_cache = {}  # account -> (rules signature, matcher)
+
+
+def rules_signature():
+    return tuple(db.session.query(func.count(CategoryRule.id), func.max(CategoryRule.id)).one())
+
+
+def current_matcher():
+    """The compiled matcher for the account's rules, rebuilt only when they change."""
+    account = current_account()
+    signature = rules_signature()
+    with _matcher_lock:
+        cached = _matcher_cache.get(account)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+    matcher = Matcher(CategoryRule.query.all())
+    with _matcher_lock:
+        _matcher_cache[account] = (signature, matcher)
+    return matcher
+
+
+def rule_values(data, known_categories):
+    """Validate an incoming rule payload and return column values. Raises ValueError."""
+    kind = data.get('kind') or 'keyword'
+    pattern = data.get('pattern')
+    category = data.get('category')
+    if not pattern or not category:
+        raise ValueError('Missing required fields')
+    if kind not in RULE_KINDS:
+        raise ValueError(f"Invalid kind {kind!r}, expected keyword or regex")
+    if len(pattern) > 200:
+        raise ValueError('Pattern is longer than 200 characters')
+    if category not in known_categories:
+        raise ValueError(f"Unknown category {category!r}")
+    if kind == 'regex':
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Invalid regex {pattern!r}: {e}")
+        # Regexes only run on texts that contain their literal, so they need one
+        if _shortest(required_literals(pattern)) < MIN_REGEX_LITERAL:
+            raise ValueError(
+                f"Regex {pattern!r} must contain at least {MIN_REGEX_LITERAL} literal characters "
+                f"that every match includes, e.g. 'UPI/' in 'UPI/\\d+'"
+            )
+    try:
+        priority = int(data.get('priority') or 0)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid priority: {data['priority']!r}")
+    return {'kind': kind, 'pattern': pattern, 'category': category, 'priority': priority}
+
+
+def parse_rules(items):
+    known_categories = {name for name, in db.session.query(Category.name)}
+    if not all(isinstance(item, dict) for item in items):
+        raise ValueError('Each rule must be an object')
+    return [rule_values(item, known_categories) for item in items]
+
+
+def fill_categories(rows):
+    """Fill in a category for transaction values that arrived without one, in place."""
+    missing = [row for row in rows if not row['category']]
+    if not missing:
+        return
+    matcher = current_matcher()
+    found = {}
+    for row in missing:
+        description = row['description']
+        if description not in found:
+            found[description] = matcher.match(description) or FALLBACK_CATEGORY
+        row['category'] = found[description]
+
+
+def recategorize_transactions(filters):
+    """Re-run the rules over the filtered transactions and move the ones that match.
+
+    Transactions no rule matches keep their category. Rollups move with each change.
+    Returns the number of transactions scanned and updated.
+    """
+    matcher = current_matcher()
+    found = {}
+    scanned = updated = 0
+    last_id = 0
+    now = datetime.utcnow()
+    while True:
+        rows = apply_transaction_filters(db.session.query(
+            Transaction.id, Transaction.date, Transaction.amount,
+            Transaction.category, Transaction.description
+        ), filters).filter(Transaction.id > last_id).order_by(Transaction.id).limit(RECATEGORIZE_BATCH_SIZE).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        scanned += len(rows)
+
+        changes, rollup_changes = [], []
+        for id_, date, amount, category, description in rows:
+            if description not in found:
+                found[description] = matcher.match(description)
+            new_category = found[description]
+            if new_category and new_category != category:
+                changes.append({'id': id_, 'category': new_category, 'updated_at': now})
+                rollup_changes += [(date, category, amount, -1), (date, new_category, amount, 1)]
+        if changes:
+            db.session.execute(update(Transaction), changes)
+            update_rollups(rollup_changes)
+            updated += len(changes)
+
+    if updated:
+        bump_data_version()
+    db.session.commit()
+    return {'scanned': scanned, 'updated': updated}
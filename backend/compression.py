@@ -0,0 +1,114 @@
+# backend/compression.py
+
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+MIN_SIZE = 1024
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/vnd.apache.arrow.stream',
+    'text/csv',
+    'text/plain',
+    'text/html'
+}
+
+
+class _GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    @staticmethod
+    def compress_all(data):
+        return gzip.compress(data, compresslevel=6)
+
+
+class _BrotliEncoder:
+    name = 'br'
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=4)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+    @staticmethod
+    def compress_all(data):
+        return brotli.compress(data, quality=4)
+
+
+def _choose_encoder():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br'] and accepted['br'] >= accepted['gzip']:
+        return _BrotliEncoder
+    if accepted['gzip']:
+        return _GzipEncoder
+    return None
+
+
+def _compress_stream(chunks, encoder):
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = encoder.compress(chunk)
+        if data:
+            yield data
+    yield encoder.flush()
+
+
+def init_compression(app, min_size=MIN_SIZE):
+    """Compress responses with brotli or gzip, as negotiated via Accept-Encoding.
+
+    Buffered bodies smaller than `min_size` bytes are sent as-is; streamed bodies are
+    compressed chunk by chunk. A compressed response's ETag gets an encoding suffix, which
+    is stripped again from If-None-Match so conditional requests keep matching.
+    """
+
+    @app.before_request
+    def strip_etag_encoding_suffix():
+        value = request.environ.get('HTTP_IF_NONE_MATCH')
+        if value:
+            request.environ['HTTP_IF_NONE_MATCH'] = value.replace('-gzip"', '"').replace('-br"', '"')
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200 or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoder_class = _choose_encoder()
+        if encoder_class is None:
+            return response
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, encoder_class())
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < min_size:
+                return response
+            response.set_data(encoder_class.compress_all(body))
+
+        response.headers['Content-Encoding'] = encoder_class.name
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f'{etag}-{encoder_class.name}', weak)
+        return response
@@ -0,0 +1,30 @@
+# backend/database.py
+
+import sqlite3
+from sqlalchemy import event
+
+# Applied to every new SQLite connection. WAL lets readers carry on while a writer
+# commits, and synchronous=NORMAL is durable under WAL except on power loss.
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,        # ms to wait on a locked database before raising
+    'mmap_size': 268435456,      # 256 MiB of memory-mapped I/O
+    'cache_size': -65536         # negative means KiB, so 64 MiB of page cache
+}
+
+
+def configure_sqlite(engine, pragmas=None):
+    """Register a connect hook that applies the given pragmas to an engine's connections."""
+    settings = dict(DEFAULT_SQLITE_PRAGMAS, **(pragmas or {}))
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        for name, value in settings.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+    return engine
@@ -0,0 +1,91 @@
+# backend/exporter.py
+
+import csv
+import io
+from flask import current_app
+from models import db, Transaction
+from queries import apply_transaction_filters
+from arrow_io import ARROW_STREAM_MIMETYPE, ChunkSink, transaction_schema, transaction_batch, stream_batches
+
+BATCH_SIZE = 5000
+EXPORT_COLUMNS = ['id', 'date', 'amount', 'category', 'description']
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': ARROW_STREAM_MIMETYPE
+}
+
+
+def iter_transaction_batches(filters, batch_size=BATCH_SIZE):
+    """Yield lists of transaction row tuples, fetched incrementally from the cursor."""
+    query = apply_transaction_filters(db.session.query(
+        Transaction.id, Transaction.date, Transaction.amount,
+        Transaction.category, Transaction.description
+    ), filters).order_by(Transaction.date, Transaction.id)
+
+    batch = []
+    for row in query.yield_per(batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        writer.writerows(
+            (id_, date.isoformat(), amount, category, description)
+            for id_, date, amount, category, description in batch
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_ndjson(batches):
+    dumps = current_app.json.dumps
+    for batch in batches:
+        yield ''.join(
+            dumps({
+                'id': id_,
+                'date': date,
+                'amount': amount,
+                'category': category,
+                'description': description
+            }) + '\n'
+            for id_, date, amount, category, description in batch
+        )
+
+
+def export_parquet(batches):
+    import pyarrow.parquet as pq
+
+    schema = transaction_schema()
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for batch in batches:
+        writer.write_batch(transaction_batch(batch, schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_arrow(batches):
+    schema = transaction_schema()
+    return stream_batches(schema, (transaction_batch(batch, schema) for batch in batches))
+
+
+EXPORTERS = {
+    'csv': export_csv,
+    'ndjson': export_ndjson,
+    'parquet': export_parquet,
+    'arrow': export_arrow
+}
@@ -1,38 +1,73 @@
 # backend/finance.py
 
-from models import Transaction, Budget, db
-from sqlalchemy import func
+from models import Transaction, Budget, BudgetVersion, MonthlyRollup, db
+from money import from_paise, in_paise
+from sqlalchemy import case, func, select, union_all
 import calendar
+from bisect import bisect_right
 from datetime import datetime
 from collections import defaultdict
 from dateutil.relativedelta import relativedelta
 
 
-def calculate_budget_summary():
-    """Calculate budget vs actual spending."""
-    budgets = {b.category: b.amount for b in Budget.query.all()}
-    
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    
-    start_date = datetime(current_year, current_month, 1)
-    last_day = calendar.monthrange(current_year, current_month)[1]
-    end_date = datetime(current_year, current_month, last_day)
-    
-    spending_by_category = db.session.query(
-        Transaction.category,
-        func.sum(Transaction.amount).label('total_spent')
-    ).filter(
-        Transaction.date.between(start_date, end_date)
-    ).group_by(
-        Transaction.category
-    ).all()
-    
-    spending = {category: float(total_spent) for category, total_spent in spending_by_category}
-    
+MAX_SUMMARY_MONTHS = 120
+
+
+def parse_month(value, field):
+    """Parse a YYYY-MM query parameter into a (year, month) tuple."""
+    try:
+        parsed = datetime.strptime(value, '%Y-%m')
+    except ValueError:
+        raise ValueError(f"Invalid '{field}' month, expected YYYY-MM")
+    return parsed.year, parsed.month
+
+
+def month_range(start, end):
+    """List every (year, month) from start to end inclusive."""
+    months = []
+    year, month = start
+    while (year, month) <= end:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def effective_budgets(months):
+    """Map each (year, month) to its {category: amount in paise} budget.
+
+    A category's budget for a month is its latest version at or before that month,
+    falling back to the undated amount in the budgets table.
+    """
+    defaults = dict(db.session.query(Budget.category, in_paise(Budget.amount)).all())
+    last_key = f"{months[-1][0]:04d}-{months[-1][1]:02d}"
+
+    versions = defaultdict(lambda: ([], []))
+    for category, month, amount in db.session.query(
+        BudgetVersion.category, BudgetVersion.month, in_paise(BudgetVersion.amount)
+    ).filter(BudgetVersion.month <= last_key).order_by(BudgetVersion.month):
+        versions[category][0].append(month)
+        versions[category][1].append(amount)
+
+    result = {}
+    for year, month in months:
+        key = f"{year:04d}-{month:02d}"
+        budgets = dict(defaults)
+        for category, (version_months, amounts) in versions.items():
+            index = bisect_right(version_months, key)
+            if index:
+                budgets[category] = amounts[index - 1]
+        result[(year, month)] = budgets
+    return result
+
+
+def summarize_month(year, month, budgets, spending):
+    """Build the budget vs actual summary for one month.
+
+    `budgets` and `spending` map categories to paise; the summary is in rupees.
+    """
     summary = {
-        'month': calendar.month_name[current_month],
-        'year': current_year,
+        'month': calendar.month_name[month],
+        'year': year,
         'categories': []
     }
     
@@ -40,15 +75,15 @@ def calculate_budget_summary():
     total_spent = 0
     
     for category, budget_amount in budgets.items():
-        spent = spending.get(category, 0.0)
+        spent = spending.get(category, 0)
         remaining = budget_amount - spent
         percent_used = (spent / budget_amount * 100) if budget_amount > 0 else 0
         
         summary['categories'].append({
             'category': category,
-            'budget': budget_amount,
-            'spent': spent,
-            'remaining': remaining,
+            'budget': from_paise(budget_amount),
+            'spent': from_paise(spent),
+            'remaining': from_paise(remaining),
             'percent_used': percent_used
         })
         
@@ -60,32 +95,114 @@ def calculate_budget_summary():
             summary['categories'].append({
                 'category': category,
                 'budget': 0,
-                'spent': spent,
-                'remaining': -spent,
-                'percent_used': float('inf')
+                'spent': from_paise(spent),
+                'remaining': from_paise(-spent),
+                'percent_used': None  # no budget to measure against
             })
             total_spent += spent
     
-    summary['total_budget'] = total_budget
-    summary['total_spent'] = total_spent
-    summary['total_remaining'] = total_budget - total_spent
+    summary['total_budget'] = from_paise(total_budget)
+    summary['total_spent'] = from_paise(total_spent)
+    summary['total_remaining'] = from_paise(total_budget - total_spent)
     summary['overall_percent_used'] = (total_spent / total_budget * 100) if total_budget > 0 else 0
     
     return summary
 
 
-def analyze_spending_patterns():
+def calculate_budget_summary():
+    """Calculate budget vs actual spending."""
+    current_month = datetime.now().month
+    current_year = datetime.now().year
+    budgets = effective_budgets([(current_year, current_month)])[(current_year, current_month)]
+    
+    spending_by_category = db.session.query(
+        MonthlyRollup.category,
+        in_paise(MonthlyRollup.total)
+    ).filter(
+        MonthlyRollup.year == current_year,
+        MonthlyRollup.month == current_month
+    ).all()
+    
+    spending = dict(spending_by_category)
+    
+    return summarize_month(current_year, current_month, budgets, spending)
+
+
+def calculate_budget_summary_range(start, end):
+    """Budget vs actual for every month from start to end, each given as (year, month).
+
+    Spending for the whole range comes from a single query over the rollup table,
+    which already holds one row per (month, category).
+    """
+    months = month_range(start, end)
+    if not months:
+        raise ValueError("'from' must not be after 'to'")
+    if len(months) > MAX_SUMMARY_MONTHS:
+        raise ValueError(f"At most {MAX_SUMMARY_MONTHS} months per request")
+
+    month_key = MonthlyRollup.year * 100 + MonthlyRollup.month
+    rows = db.session.query(
+        MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.category, in_paise(MonthlyRollup.total)
+    ).filter(
+        month_key.between(start[0] * 100 + start[1], end[0] * 100 + end[1])
+    ).all()
+
+    spending = defaultdict(dict)
+    for year, month, category, total in rows:
+        spending[(year, month)][category] = total
+
+    budgets = effective_budgets(months)
+    summaries = [summarize_month(year, month, budgets[(year, month)], spending[(year, month)]) for year, month in months]
+
+    # Range totals from the paise amounts, not by adding up the rounded monthly rupees
+    total_budget = sum(sum(budgets[m].values()) for m in months)
+    total_spent = sum(sum(spending[m].values()) for m in months)
+    return {
+        'from': f"{start[0]:04d}-{start[1]:02d}",
+        'to': f"{end[0]:04d}-{end[1]:02d}",
+        'months': summaries,
+        'total_budget': from_paise(total_budget),
+        'total_spent': from_paise(total_spent),
+        'total_remaining': from_paise(total_budget - total_spent),
+        'overall_percent_used': (total_spent / total_budget * 100) if total_budget > 0 else 0
+    }
+
+
+def analyze_spending_patterns(months=6):
     """Analyze spending patterns over time for charts."""
-    six_months_ago = datetime.now() - relativedelta(months=6)
-    transactions = Transaction.query.filter(Transaction.date >= six_months_ago).all()
+    window_start = datetime.now() - relativedelta(months=months)
+    first_full_month = datetime(window_start.year, window_start.month, 1) + relativedelta(months=1)
 
-    monthly_spending = defaultdict(lambda: defaultdict(float))
-    category_totals = defaultdict(float)
+    # Whole months come straight from the rollup table; only the partial month at
+    # the start of the window is aggregated from raw transactions. Both halves are
+    # grouped together so the database returns one row per (month, category).
+    full_months = select(
+        func.printf('%04d-%02d', MonthlyRollup.year, MonthlyRollup.month).label('month_key'),
+        MonthlyRollup.category.label('category'),
+        in_paise(MonthlyRollup.total).label('total')
+    ).where(
+        (MonthlyRollup.year * 100 + MonthlyRollup.month) >= first_full_month.year * 100 + first_full_month.month
+    )
+    partial_month = select(
+        func.strftime('%Y-%m', Transaction.date).label('month_key'),
+        Transaction.category.label('category'),
+        in_paise(Transaction.amount).label('total')
+    ).where(
+        Transaction.date >= window_start,
+        Transaction.date < first_full_month
+    )
+    combined = union_all(full_months, partial_month).subquery()
+    rows = db.session.execute(
+        select(combined.c.month_key, combined.c.category, func.sum(combined.c.total))
+        .group_by(combined.c.month_key, combined.c.category)
+    ).all()
+
+    monthly_spending = defaultdict(dict)
+    category_totals = defaultdict(int)
 
-    for transaction in transactions:
-        month_key = f"{transaction.date.year}-{transaction.date.month:02d}"
-        monthly_spending[month_key][transaction.category] += transaction.amount
-        category_totals[transaction.category] += transaction.amount
+    for month_key, category, total in rows:
+        monthly_spending[month_key][category] = total
+        category_totals[category] += total
 
     months = sorted(monthly_spending.keys())
     categories = sorted(category_totals.keys())
@@ -94,13 +211,187 @@ def analyze_spending_patterns():
     for month in months:
         by_date.append({
             "month": month,
-            "spending": [monthly_spending[month].get(category, 0) for category in categories]
+            "spending": [from_paise(monthly_spending[month].get(category, 0)) for category in categories]
         })
 
-    by_category = [{"category": cat, "total": category_totals[cat]} for cat in categories]
+    by_category = [{"category": cat, "total": from_paise(category_totals[cat])} for cat in categories]
 
     return {
         "by_date": by_date,
         "by_category": by_category
     }
 
+
+
+TIMESERIES_GRANULARITIES = ('day', 'week', 'month')
+MAX_TIMESERIES_BUCKETS = 20000
+
+
+def _bucket_expression(granularity):
+    """SQL expression giving the first day (YYYY-MM-DD) of the bucket a transaction falls in."""
+    if granularity == 'day':
+        return func.date(Transaction.date)
+    if granularity == 'week':
+        # Weeks start on Monday: jump to the coming Sunday, then back six days
+        return func.date(Transaction.date, 'weekday 0', '-6 days')
+    return func.strftime('%Y-%m-01', Transaction.date)
+
+
+def _bucket_axis(granularity, start, end):
+    """Every bucket start from start to end as a datetime64[D] array."""
+    import numpy as np
+    first = np.datetime64(start.date(), 'D')
+    last = np.datetime64(end.date(), 'D')
+    if granularity == 'day':
+        return np.arange(first, last + 1, dtype='datetime64[D]')
+    if granularity == 'week':
+        # numpy's day 0 (1970-01-01) was a Thursday, so Mondays sit 3 days past a multiple of 7
+        offset = (first.astype('int64') - 4) % 7
+        return np.arange(first - offset, last + 1, 7, dtype='datetime64[D]')
+    return np.arange(first.astype('datetime64[M]'), last.astype('datetime64[M]') + 1).astype('datetime64[D]')
+
+
+def bucket_count(granularity, start, end):
+    return len(_bucket_axis(granularity, start, end))
+
+
+def spending_timeseries(granularity, start, end, categories=None, window=7):
+    """Spending per bucket and category between start and end (both dates inclusive).
+
+    Bucketing happens in SQL; gap filling and the cumulative/rolling stats are computed
+    on a dense category x bucket matrix. The result is columnar: one list per series.
+    """
+    # numpy is only needed here, so it stays out of the import path of every other route
+    import numpy as np
+    bucket = _bucket_expression(granularity).label('bucket')
+    query = db.session.query(
+        bucket, Transaction.category, in_paise(func.sum(Transaction.amount))
+    ).filter(
+        Transaction.date >= start,
+        Transaction.date < end + relativedelta(days=1)
+    )
+    if categories:
+        query = query.filter(Transaction.category.in_(categories))
+    rows = query.group_by(bucket, Transaction.category).all()
+
+    axis = _bucket_axis(granularity, start, end)
+    if rows:
+        row_buckets, row_categories, row_totals = zip(*rows)
+    else:
+        row_buckets, row_categories, row_totals = (), (), ()
+
+    names = sorted(set(categories or ()) | set(row_categories))
+    # Paise in int64, so the totals and running sums are exact; rupees only on the way out
+    matrix = np.zeros((len(names), len(axis)), dtype=np.int64)
+    if rows:
+        bucket_index = np.searchsorted(axis, np.array(row_buckets, dtype='datetime64[D]'))
+        category_index = np.searchsorted(np.array(names), np.array(row_categories))
+        np.add.at(matrix, (category_index, bucket_index), np.array(row_totals, dtype=np.int64))
+
+    total = matrix.sum(axis=0)
+    cumulative = np.cumsum(total)
+    # Rolling mean over the trailing `window` buckets, averaging fewer at the very start
+    shifted = np.concatenate(([0], cumulative))
+    lower = np.maximum(np.arange(1, len(axis) + 1) - window, 0)
+    rolling = (shifted[1:] - shifted[lower]) / (np.arange(1, len(axis) + 1) - lower)
+
+    return {
+        'granularity': granularity,
+        'from': start.strftime('%Y-%m-%d'),
+        'to': end.strftime('%Y-%m-%d'),
+        'window': window,
+        'buckets': np.datetime_as_string(axis).tolist(),
+        'series': {name: from_paise(matrix[i]).tolist() for i, name in enumerate(names)},
+        'total': from_paise(total).tolist(),
+        'cumulative': from_paise(cumulative).tolist(),
+        'rolling_mean': from_paise(rolling).tolist()
+    }
+
+
+FORECAST_QUANTILES = (10, 90)
+
+
+def spending_forecast(history_months=12, today=None):
+    """Projected month-end spending and overrun probability for every category at once.
+
+    Each past month supplies one scenario per category: what was spent in it after
+    today's day of the month. Adding a scenario to this month's spending so far gives one
+    possible month-end total, so the mean, quantiles and share of scenarios over budget
+    are the projection, its range and the overrun probability. Past months from before
+    the first transaction are left out; without any history the current daily rate is
+    extrapolated instead.
+
+    SQL reduces the history to two sums per (category, month), through today's day of
+    the month and through the last day this month has, so no row per day ever reaches
+    Python. Everything after that is NumPy over a dense category x month array of
+    int64 paise.
+    """
+    import numpy as np
+    today = today or datetime.now()
+    year, month, day = today.year, today.month, today.day
+    days_in_month = calendar.monthrange(year, month)[1]
+    first_index = year * 12 + month - 1 - history_months
+    start = datetime(first_index // 12, first_index % 12 + 1, 1)
+    end = datetime(year, month, day) + relativedelta(days=1)
+
+    month_key = func.strftime('%Y-%m', Transaction.date).label('month')
+    day_of_month = func.strftime('%d', Transaction.date)
+    rows = db.session.execute(
+        select(
+            Transaction.category, month_key,
+            func.sum(case((day_of_month <= f'{day:02d}', in_paise(Transaction.amount)), else_=0)),
+            # Only days this month actually has count, so a 31-day month never inflates February
+            func.sum(case((day_of_month <= f'{days_in_month:02d}', in_paise(Transaction.amount)), else_=0))
+        ).where(
+            Transaction.date >= start,
+            Transaction.date < end
+        ).group_by(Transaction.category, month_key)
+    ).all()
+    budgets = effective_budgets([(year, month)])[(year, month)]
+
+    names = sorted(set(budgets) | {category for category, _, _, _ in rows})
+    # [category, month, 0] is paise spent through today's day, [..., 1] through month end
+    matrix = np.zeros((len(names), history_months + 1, 2), dtype=np.int64)
+    if rows:
+        row_categories, row_months, through_day, through_end = zip(*rows)
+        category_index = np.searchsorted(np.array(names), np.array(row_categories))
+        month_index = np.array(row_months, dtype='datetime64[M]').astype('int64') - (first_index - 1970 * 12)
+        matrix[category_index, month_index] = np.column_stack((through_day, through_end))
+
+    spent = matrix[:, -1, 0]
+    active = np.flatnonzero(matrix[:, :-1, 1].any(axis=0))
+    history = matrix[:, active[0]:-1] if len(active) else matrix[:, :0]
+    scenarios = spent[:, None] + (history[:, :, 1] - history[:, :, 0])
+
+    budget = np.array([budgets.get(name, 0) for name in names], dtype=np.int64)
+    if scenarios.shape[1]:
+        projected = scenarios.mean(axis=1)
+        low, high = np.percentile(scenarios, FORECAST_QUANTILES, axis=1)
+        overrun = (scenarios > budget[:, None]).mean(axis=1)
+    else:
+        projected = low = high = spent * days_in_month / day
+        overrun = None
+
+    categories = []
+    for i, name in enumerate(names):
+        has_budget = overrun is not None and budget[i] > 0
+        categories.append({
+            'category': name,
+            'budget': from_paise(budgets[name]) if name in budgets else None,
+            'spent': from_paise(int(spent[i])),
+            'projected': from_paise(round(float(projected[i]))),
+            'projected_low': from_paise(round(float(low[i]))),
+            'projected_high': from_paise(round(float(high[i]))),
+            'overrun_probability': float(overrun[i]) if has_budget else None
+        })
+    return {
+        'month': calendar.month_name[month],
+        'year': year,
+        'day': day,
+        'days_in_month': days_in_month,
+        'history_months': int(scenarios.shape[1]),
+        'categories': categories,
+        'total_budget': from_paise(int(budget.sum())),
+        'total_spent': from_paise(int(spent.sum())),
+        'total_projected': from_paise(round(float(projected.sum())))
+    }
@@ -0,0 +1,38 @@
+# backend/gunicorn.conf.py
+#
+# Production server settings. Start with:  gunicorn -c gunicorn.conf.py app:app
+# WEB_CONCURRENCY sets the number of worker processes and GUNICORN_THREADS the
+# threads per worker.
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = 5
+accesslog = '-'
+
+# Import the app once in the master, not once per worker
+preload_app = True
+
+
+def on_starting(server):
+    # Apply migrations and seeding before any worker forks, so the workers' first-request
+    # check finds the schema current and returns straight away
+    from app import app
+    from migrations import init_database
+    with app.app_context():
+        init_database()
+
+
+def post_fork(server, worker):
+    # Pooled connections opened by the master during startup must not be shared
+    # with forked workers; each worker opens its own.
+    from app import app
+    from models import db
+    with app.app_context():
+        db.engine.dispose(close=False)
+    app.extensions['shard_router'].dispose()
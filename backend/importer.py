@@ -0,0 +1,141 @@
+# backend/importer.py
+
+import codecs
+import csv
+import json
+import logging
+import re
+from sqlalchemy import insert
+from models import db, Transaction
+from rollups import update_rollups
+from cache import bump_data_version
+from validation import transaction_values
+from categorizer import fill_categories
+
+CHUNK_SIZE = 64 * 1024
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+_LINE_END = re.compile(r'\r\n|\r|\n')
+
+
+class ImportAborted(Exception):
+    """The body could not be read to the end. `summary` covers the rows saved before that."""
+
+    def __init__(self, message, summary):
+        super().__init__(message)
+        self.summary = summary
+
+
+def iter_lines(stream, chunk_size=CHUNK_SIZE):
+    """Yield decoded text lines from a binary stream without reading it all into memory.
+
+    Only \\n, \\r\\n and \\r end a line. str.splitlines() would also split on U+2028,
+    U+0085 and other characters that JSON strings may contain unescaped.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        pending += decoder.decode(chunk)
+        start = 0
+        for match in _LINE_END.finditer(pending):
+            if match.end() == len(pending) and match.group() == '\r':
+                # Possibly the first half of a \r\n split across chunks
+                break
+            yield pending[start:match.end()]
+            start = match.end()
+        # Whatever follows the last line end is cut off mid-chunk; keep it for the next round
+        pending = pending[start:]
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def iter_csv_records(lines):
+    reader = csv.DictReader(lines)
+    for record in reader:
+        # line_num is the physical line the record ended on, header included
+        yield reader.line_num, record
+
+
+def iter_ndjson_records(lines):
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            record = ValueError('Expected a JSON object')
+        yield line_number, record
+
+
+RECORD_READERS = {
+    'csv': iter_csv_records,
+    'ndjson': iter_ndjson_records
+}
+
+
+def _insert_batch(batch):
+    fill_categories(batch)
+    db.session.execute(insert(Transaction), batch)
+    update_rollups((row['date'], row['category'], row['amount'], 1) for row in batch)
+    bump_data_version()
+    db.session.commit()
+
+
+def import_transactions(stream, fmt):
+    """Stream-parse a CSV or NDJSON body and insert it in batches.
+
+    Rows that fail validation are reported back instead of aborting the import, and so
+    are batches the database rejects: each batch commits on its own, so a failed one is
+    rolled back alone. Returns a summary dict with inserted/failed counts and the first
+    errors. Raises ImportAborted, carrying that summary, if the body cannot be read.
+    """
+    records = RECORD_READERS[fmt](iter_lines(stream))
+    summary = {'inserted': 0, 'failed': 0, 'errors': []}
+    batch = []
+    batch_lines = []
+
+    def report(line, error):
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append({'line': line, 'error': error})
+
+    def flush():
+        try:
+            _insert_batch(batch)
+            summary['inserted'] += len(batch)
+        except Exception as e:
+            logging.error(f"Import batch on lines {batch_lines[0]}-{batch_lines[-1]} failed: {str(e)}")
+            db.session.rollback()
+            summary['failed'] += len(batch)
+            report(batch_lines[0], f"Rows on lines {batch_lines[0]}-{batch_lines[-1]} were not saved: {e}")
+        batch.clear()
+        batch_lines.clear()
+
+    try:
+        for line_number, record in records:
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                batch.append(transaction_values(record))
+                batch_lines.append(line_number)
+            except ValueError as e:
+                summary['failed'] += 1
+                report(line_number, str(e))
+                continue
+
+            if len(batch) >= BATCH_SIZE:
+                flush()
+    except (ValueError, csv.Error) as e:
+        # Undecodable bytes or malformed CSV: nothing after this point can be trusted
+        raise ImportAborted(str(e), summary)
+
+    if batch:
+        flush()
+    return summary
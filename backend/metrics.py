@@ -0,0 +1,183 @@
+# backend/metrics.py
+#
+# Request and SQL instrumentation. Every request is timed into a per-route latency
+# histogram, and every SQL statement into per-request query count and time, so a slow
+# page can be split into database time and everything else (serialization,
+# compression, Python). Totals are served at /api/metrics in the Prometheus text
+# format, and each response carries a Server-Timing header for the browser dev tools.
+#
+# Metrics live in process memory: under gunicorn each worker reports its own numbers,
+# with a pid label so scrapes from different workers can be told apart.
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 1000)
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe in-process store for the handful of metrics the app exports."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.slow_query_seconds = 0.2
+        self.request_latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.query_latency = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self.queries_per_request = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))
+        self.slow_queries = defaultdict(int)
+
+    def record_request(self, method, route, status, seconds):
+        with self._lock:
+            self.request_latency[(method, route, str(status))].observe(seconds)
+
+    def record_queries(self, route, durations):
+        with self._lock:
+            histogram = self.query_latency[(route,)]
+            for seconds in durations:
+                histogram.observe(seconds)
+            self.queries_per_request[(route,)].observe(len(durations))
+            slow = sum(seconds >= self.slow_query_seconds for seconds in durations)
+            if slow:
+                self.slow_queries[(route,)] += slow
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        pid = str(os.getpid())
+        lines = []
+        with self._lock:
+            _render_histogram(lines, 'saveeazy_http_request_duration_seconds',
+                              'Time from request start to response, by route.',
+                              ('method', 'route', 'status'), self.request_latency, pid)
+            _render_histogram(lines, 'saveeazy_db_query_duration_seconds',
+                              'Time spent in each SQL statement, by the route that ran it.',
+                              ('route',), self.query_latency, pid)
+            _render_histogram(lines, 'saveeazy_db_queries_per_request',
+                              'SQL statements run per request, by route. A high count points at N+1 queries.',
+                              ('route',), self.queries_per_request, pid)
+            _render_counter(lines, 'saveeazy_db_slow_queries_total',
+                            'SQL statements slower than the slow-query threshold.',
+                            ('route',), self.slow_queries, pid)
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(names, values, pid, **extra):
+    pairs = list(zip(names, values)) + [('pid', pid)] + list(extra.items())
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _render_histogram(lines, name, help_text, label_names, series, pid):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for key, histogram in sorted(series.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(label_names, key, pid, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(label_names, key, pid)} {histogram.sum}')
+        lines.append(f'{name}_count{_labels(label_names, key, pid)} {histogram.count}')
+
+
+def _render_counter(lines, name, help_text, label_names, series, pid):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} counter')
+    for key, value in sorted(series.items()):
+        lines.append(f'{name}{_labels(label_names, key, pid)} {value}')
+
+
+metrics = MetricsRegistry()
+
+
+def _route():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's execution context, so a statement that fails leaves nothing behind
+    if context is not None:
+        context.query_started = time.perf_counter()
+
+
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'query_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    if elapsed >= metrics.slow_query_seconds:
+        logging.warning(f"Slow query ({elapsed * 1000:.1f} ms): {' '.join(statement.split())[:500]}")
+    if has_request_context() and 'query_times' in g:
+        g.query_times.append(elapsed)
+
+
+def init_metrics(app):
+    """Instrument the app's requests and every SQLAlchemy engine, and add /api/metrics.
+
+    SLOW_QUERY_MS in the app config sets the slow-query logging threshold.
+    """
+    metrics.slow_query_seconds = app.config.get('SLOW_QUERY_MS', 200) / 1000
+    # Listening on the Engine class covers every engine, including ones created later
+    if not event.contains(Engine, 'before_cursor_execute', _start_query_timer):
+        event.listen(Engine, 'before_cursor_execute', _start_query_timer)
+        event.listen(Engine, 'after_cursor_execute', _stop_query_timer)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.query_times = []
+
+    @app.after_request
+    def add_server_timing(response):
+        if 'request_started' not in g:
+            return response
+        total_ms = (time.perf_counter() - g.request_started) * 1000
+        db_ms = sum(g.query_times) * 1000
+        response.headers.add('Server-Timing', f'db;dur={db_ms:.1f};desc="{len(g.query_times)} queries"')
+        response.headers.add('Server-Timing', f'app;dur={total_ms - db_ms:.1f}')
+        response.headers.add('Server-Timing', f'total;dur={total_ms:.1f}')
+
+        # Record once the body has been sent, so streamed responses count in full
+        started, query_times = g.request_started, g.query_times
+        method, route, status = request.method, _route(), response.status_code
+
+        def record():
+            metrics.record_request(method, route, status, time.perf_counter() - started)
+            metrics.record_queries(route, query_times)
+
+        response.call_on_close(record)
+        return response
+
+    @app.route('/api/metrics')
+    def prometheus_metrics():
+        return Response(metrics.render(), content_type=PROMETHEUS_MIMETYPE)
+
+    return metrics
@@ -0,0 +1,187 @@
+# backend/migrations.py
+#
+# create_all() only creates missing tables; it never touches tables that already
+# exist. Changes to existing tables (new indexes, columns, backfills) are listed here
+# as numbered migrations and applied in order at startup. The applied version is kept
+# in SQLite's PRAGMA user_version. Brand new databases run every migration after
+# create_all(), so each step must be a no-op when the schema is already current.
+
+import logging
+from datetime import datetime
+from sqlalchemy import text
+from models import (
+    db, Category, Transaction, Budget, BudgetVersion, MonthlyRollup, DataVersion, DEFAULT_CATEGORIES
+)
+from money import to_paise
+from rollups import rebuild_rollups
+from search import create_search_index, create_search_schema
+from cache import bump_data_version
+
+MIGRATIONS = []
+CONVERT_BATCH_SIZE = 5000
+
+
+def migration(version, description):
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        return func
+    return register
+
+
+def current_version():
+    return db.session.execute(text('PRAGMA user_version')).scalar()
+
+
+@migration(1, 'backfill monthly rollups')
+def backfill_rollups():
+    if MonthlyRollup.query.first() is None and db.session.query(Transaction.id).first() is not None:
+        rebuild_rollups()
+
+
+@migration(2, 'transaction date/category indexes')
+def add_transaction_indexes():
+    db.session.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_transactions_date_category ON transactions (date, category)'
+    ))
+    db.session.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_transactions_category_date ON transactions (category, date)'
+    ))
+
+
+@migration(3, 'seed the data version row')
+def seed_data_version():
+    if db.session.get(DataVersion, 1) is None:
+        db.session.add(DataVersion(id=1, version=0))
+
+
+@migration(4, 'transaction created_at/updated_at columns')
+def add_transaction_timestamps():
+    columns = {row[1] for row in db.session.execute(text('PRAGMA table_info(transactions)'))}
+    for column in ('created_at', 'updated_at'):
+        if column not in columns:
+            db.session.execute(text(f'ALTER TABLE transactions ADD COLUMN {column} DATETIME'))
+    # Rows from before this migration have no history; treat them as written now
+    db.session.execute(
+        text('UPDATE transactions SET created_at = coalesce(created_at, :now), updated_at = coalesce(updated_at, :now) '
+             'WHERE created_at IS NULL OR updated_at IS NULL'),
+        {'now': datetime.utcnow()}
+    )
+    db.session.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_transactions_updated_at ON transactions (updated_at, id)'
+    ))
+
+
+@migration(5, 'full-text search index over descriptions')
+def add_search_index():
+    create_search_index()
+
+
+def column_type(table, column):
+    for row in db.session.execute(text(f'PRAGMA table_info({table})')):
+        if row[1] == column:
+            return row[2].upper()
+    return None
+
+
+def rebuild_table(model, converted=None):
+    """Recreate a model's table from its current definition and copy the rows across.
+
+    SQLite cannot change a column's type in place. `converted` maps column names to the
+    SQL expressions that produce their new values from the old table.
+    """
+    converted = converted or {}
+    table = model.__table__
+    old = f'{table.name}_old'
+    db.session.execute(text(f'ALTER TABLE {table.name} RENAME TO {old}'))
+    # Named indexes keep their names through the rename; drop them so the new table can have them
+    for name in db.session.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table AND sql IS NOT NULL"
+    ), {'table': old}).scalars().all():
+        db.session.execute(text(f'DROP INDEX {name}'))
+    table.create(db.session.connection())
+    columns = [c.name for c in table.columns]
+    db.session.execute(text(
+        f"INSERT INTO {table.name} ({', '.join(columns)}) "
+        f"SELECT {', '.join(converted.get(c, c) for c in columns)} FROM {old}"
+    ))
+    db.session.execute(text(f'DROP TABLE {old}'))
+
+
+def convert_to_paise(table, column):
+    """Rewrite a column of rupee amounts as paise with to_paise(), a batch of rows at a time.
+
+    Done in Python rather than with SQL round(), which rounds the binary float: 1.005 is
+    stored as 1.00499999..., so round(1.005 * 100) is 100 where the API gives 101.
+    """
+    last = 0
+    while True:
+        rows = db.session.execute(text(
+            f'SELECT rowid, {column} FROM {table} WHERE rowid > :last ORDER BY rowid LIMIT :limit'
+        ), {'last': last, 'limit': CONVERT_BATCH_SIZE}).all()
+        if not rows:
+            break
+        last = rows[-1][0]
+        db.session.execute(
+            text(f'UPDATE {table} SET {column} = :paise WHERE rowid = :rowid'),
+            [{'rowid': rowid, 'paise': to_paise(amount)} for rowid, amount in rows]
+        )
+
+
+@migration(6, 'store amounts as integer paise')
+def store_amounts_in_paise():
+    # A write first: the sqlite3 driver only opens a transaction for DML, and the DDL
+    # below must run inside it so an interrupted rebuild rolls back as a whole
+    bump_data_version()
+    for model, column in ((Transaction, 'amount'), (Budget, 'amount'), (BudgetVersion, 'amount'),
+                          (MonthlyRollup, 'total')):
+        if column_type(model.__tablename__, column) != 'INTEGER':
+            rebuild_table(model)
+            convert_to_paise(model.__tablename__, column)
+    # The search triggers were dropped along with the old transactions table
+    create_search_schema()
+    rebuild_rollups()
+
+
+@migration(7, 'report job start time')
+def add_report_started_at():
+    columns = {row[1] for row in db.session.execute(text('PRAGMA table_info(report_jobs)'))}
+    if 'started_at' not in columns:
+        db.session.execute(text('ALTER TABLE report_jobs ADD COLUMN started_at DATETIME'))
+
+
+@migration(8, 'random token per database for the response cache')
+def add_data_version_token():
+    columns = {row[1] for row in db.session.execute(text('PRAGMA table_info(data_version)'))}
+    if 'token' not in columns:
+        db.session.execute(text('ALTER TABLE data_version ADD COLUMN token VARCHAR(32)'))
+    db.session.execute(text('UPDATE data_version SET token = lower(hex(randomblob(16))) WHERE token IS NULL'))
+
+
+def upgrade_database():
+    """Create missing tables, then apply any migrations newer than the stored version."""
+    # Through the session's bind, so this works on whichever account's database is current
+    db.metadata.create_all(db.session.get_bind())
+    version = current_version()
+    for target, description, func in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if target <= version:
+            continue
+        logging.info(f"Applying migration {target}: {description}")
+        try:
+            func()
+            db.session.execute(text(f'PRAGMA user_version = {int(target)}'))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        version = target
+    return version
+
+
+def init_database():
+    """Bring the schema up to date and seed the default categories into an empty table."""
+    version = upgrade_database()
+    if Category.query.count() == 0:
+        for category_name in DEFAULT_CATEGORIES:
+            db.session.add(Category(name=category_name))
+        db.session.commit()
+    return version
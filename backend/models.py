@@ -1,28 +1,57 @@
 # backend/models.py
 from flask_sqlalchemy import SQLAlchemy
+import uuid
 from datetime import datetime
+from sharding import ShardedSession
+from money import Paise
 
-db = SQLAlchemy()
+# Every statement is bound to the requesting account's database (see sharding.py)
+db = SQLAlchemy(session_options={'class_': ShardedSession})
+
+# Seeded into an empty database at startup
+DEFAULT_CATEGORIES = [
+    "Housing", "Transportation", "Food", "Utilities",
+    "Insurance", "Healthcare", "Savings", "Debt",
+    "Personal", "Recreation", "Miscellaneous"
+]
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
-    
+    __table_args__ = (
+        db.Index('ix_transactions_date_category', 'date', 'category'),
+        db.Index('ix_transactions_category_date', 'category', 'date'),
+        db.Index('ix_transactions_updated_at', 'updated_at', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Ensure valid timestamp
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(Paise, nullable=False)  # stored as paise, read and written as rupees
     category = db.Column(db.String(50), nullable=False)
     description = db.Column(db.String(200), default='')  # Default empty string to avoid NoneType
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __repr__(self):
         return f'<Transaction {self.id}: ₹{self.amount} on {self.date.strftime("%Y-%m-%d")}>'
 
 
+class TransactionTombstone(db.Model):
+    """Marks a deleted transaction so clients syncing changes can drop their copy."""
+    __tablename__ = 'transaction_tombstones'
+
+    id = db.Column(db.Integer, primary_key=True)  # id of the deleted transaction
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<TransactionTombstone {self.id} at {self.deleted_at.isoformat()}>'
+
+
 class Budget(db.Model):
     __tablename__ = 'budgets'
 
     id = db.Column(db.Integer, primary_key=True)
     category = db.Column(db.String(50), nullable=False, unique=True)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(Paise, nullable=False)  # stored as paise, read and written as rupees
 
     def __repr__(self):
         return f'<Budget {self.category}: ₹{self.amount}>'
@@ -36,3 +65,82 @@ class Category(db.Model):
 
     def __repr__(self):
         return f'<Category {self.name}>'
+
+
+class CategoryRule(db.Model):
+    """Maps descriptions containing a keyword (or matching a regex) to a category.
+
+    Rules are only ever added or deleted, never edited, and AUTOINCREMENT keeps ids from
+    being reused, so (count, max id) identifies the current rule set.
+    """
+    __tablename__ = 'category_rules'
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(10), nullable=False, default='keyword')  # 'keyword' or 'regex'
+    pattern = db.Column(db.String(200), nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    priority = db.Column(db.Integer, nullable=False, default=0)  # higher wins when several rules match
+
+    def __repr__(self):
+        return f'<CategoryRule {self.kind} {self.pattern!r} -> {self.category}>'
+
+
+class MonthlyRollup(db.Model):
+    __tablename__ = 'monthly_rollups'
+
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    total = db.Column(Paise, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<MonthlyRollup {self.year}-{self.month:02d} {self.category}: ₹{self.total} ({self.count})>'
+
+
+class DataVersion(db.Model):
+    __tablename__ = 'data_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    # Random per database, so cached responses of a replaced or recreated file never match
+    token = db.Column(db.String(32), default=lambda: uuid.uuid4().hex)
+
+    def __repr__(self):
+        return f'<DataVersion {self.version}>'
+
+
+class BudgetVersion(db.Model):
+    """A category budget that applies from `month` (YYYY-MM) until a later version replaces it."""
+    __tablename__ = 'budget_versions'
+    __table_args__ = (
+        db.UniqueConstraint('category', 'month', name='uq_budget_versions_category_month'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    category = db.Column(db.String(50), nullable=False)
+    month = db.Column(db.String(7), nullable=False)
+    amount = db.Column(Paise, nullable=False)  # stored as paise, read and written as rupees
+
+    def __repr__(self):
+        return f'<BudgetVersion {self.category} from {self.month}: ₹{self.amount}>'
+
+
+class ReportJob(db.Model):
+    """A report computed in the background; the row is deleted once `expires_at` passes."""
+    __tablename__ = 'report_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    kind = db.Column(db.String(30), nullable=False)
+    params = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    status = db.Column(db.String(10), nullable=False, default='queued')  # queued, running, done, failed
+    result = db.Column(db.Text)  # JSON, once done
+    error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<ReportJob {self.id} {self.kind} {self.status}>'
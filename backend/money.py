@@ -0,0 +1,50 @@
+# backend/money.py
+#
+# Amounts are stored as whole paise in INTEGER columns, so SQL sums are exact integer
+# arithmetic and long-range totals never drift. The API still speaks rupees: Paise
+# columns take and return rupees in Python, and code that adds amounts up (rollups,
+# summaries, NumPy arrays) reads the raw integers through in_paise() and converts once,
+# at the end, with from_paise().
+
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import Integer, type_coerce
+from sqlalchemy.types import TypeDecorator
+
+PAISE_PER_RUPEE = 100
+
+
+def to_paise(rupees):
+    """Rupees (int, float, Decimal or numeric string) to whole paise, rounding half up."""
+    if isinstance(rupees, int):
+        return rupees * PAISE_PER_RUPEE
+    if isinstance(rupees, float):
+        scaled = rupees * PAISE_PER_RUPEE
+        paise = round(scaled)
+        if abs(scaled - paise) < 0.49:
+            return paise
+        # Close to half a paisa, where binary floats can land on either side: decide on
+        # the shortest decimal that round-trips instead (str(1.005) is '1.005')
+        rupees = str(rupees)
+    return int((Decimal(rupees) * PAISE_PER_RUPEE).to_integral_value(ROUND_HALF_UP))
+
+
+def from_paise(paise):
+    """Whole paise to rupees. The float is the closest one to the exact decimal amount."""
+    return paise / PAISE_PER_RUPEE
+
+
+def in_paise(expression):
+    """Read a Paise column or expression as raw integer paise instead of rupees."""
+    return type_coerce(expression, Integer)
+
+
+class Paise(TypeDecorator):
+    """INTEGER column holding paise that Python code reads and writes in rupees."""
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_paise(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_paise(value)
@@ -0,0 +1,86 @@
+# backend/queries.py
+
+import base64
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from models import Transaction
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def parse_day(value, field):
+    """Parse a YYYY-MM-DD query parameter, raising ValueError with the field name."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"Invalid '{field}' date, expected YYYY-MM-DD")
+
+
+def parse_transaction_filters(args):
+    """Read the from/to/category filters shared by the transaction listing routes."""
+    filters = {'start': None, 'end': None, 'categories': []}
+    if args.get('from'):
+        filters['start'] = parse_day(args['from'], 'from')
+    if args.get('to'):
+        # 'to' is inclusive, so compare against the start of the following day
+        try:
+            filters['end'] = parse_day(args['to'], 'to') + timedelta(days=1)
+        except OverflowError:
+            raise ValueError("'to' is out of range")
+    for value in args.getlist('category'):
+        filters['categories'].extend(c for c in value.split(',') if c)
+    return filters
+
+
+def apply_transaction_filters(query, filters):
+    """Apply parsed filters to a Transaction query as SQL predicates."""
+    if filters['start'] is not None:
+        query = query.filter(Transaction.date >= filters['start'])
+    if filters['end'] is not None:
+        query = query.filter(Transaction.date < filters['end'])
+    if filters['categories']:
+        query = query.filter(Transaction.category.in_(filters['categories']))
+    return query
+
+
+def parse_limit(value):
+    if value is None or value == '':
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("Invalid 'limit', expected an integer")
+    if limit < 1:
+        raise ValueError("'limit' must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def encode_cursor(transaction):
+    raw = f"{transaction.date.isoformat()}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_str, id_str = raw.rsplit('|', 1)
+        return datetime.fromisoformat(date_str), int(id_str)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid 'cursor'")
+
+
+def paginate_transactions(query, limit, cursor=None):
+    """Keyset-paginate newest first on (date, id).
+
+    Returns the page and the cursor for the next one (None on the last page).
+    """
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Transaction.date < cursor_date,
+            and_(Transaction.date == cursor_date, Transaction.id < cursor_id)
+        ))
+    rows = query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
@@ -0,0 +1,193 @@
+# backend/reports.py
+#
+# Background report jobs. POST /api/reports stores a job row and hands it to a small
+# bounded thread pool, so a multi-year report never holds a request worker for seconds;
+# the client polls GET /api/reports/<id> until the job is done. Jobs and results are
+# stored in the account's own database, so whichever worker process answers the poll
+# can read them, and they are deleted REPORT_TTL_SECONDS after submission. A job lives
+# only in the pool of the process that accepted it, so if that process dies the job is
+# never finished; one still queued or running REPORT_STALE_SECONDS after it was
+# submitted or started is reported as failed instead of leaving clients polling.
+#
+# Threads rather than processes: the work is almost all SQLite queries, which release
+# the GIL, and a thread can reuse the app's engines and account routing as they are.
+
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import g
+from sqlalchemy import delete
+from models import db, ReportJob
+from finance import (
+    calculate_budget_summary_range, analyze_spending_patterns, parse_month, month_range, MAX_SUMMARY_MONTHS
+)
+
+PENDING_STATUSES = ('queued', 'running')
+
+
+class QueueFull(Exception):
+    pass
+
+
+class ReportExecutor:
+    """Thread pool that accepts at most `max_pending` queued or running jobs.
+
+    The pool is created on the first submit, so a gunicorn master that imports the app
+    before forking never hands its workers a pool whose threads did not survive the fork.
+    """
+
+    def __init__(self, max_workers=2, max_pending=16):
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull('Too many reports are being prepared, try again shortly')
+        try:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='report')
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+def _budget_summary_params(params):
+    now = datetime.now()
+    end = parse_month(params['to'], 'to') if params.get('to') else (now.year, now.month)
+    start = parse_month(params['from'], 'from') if params.get('from') else (end[0] - 1, end[1])
+    months = len(month_range(start, end))
+    if months == 0:
+        raise ValueError("'from' must not be after 'to'")
+    if months > MAX_SUMMARY_MONTHS:
+        raise ValueError(f'At most {MAX_SUMMARY_MONTHS} months per report')
+    return {'from': f'{start[0]:04d}-{start[1]:02d}', 'to': f'{end[0]:04d}-{end[1]:02d}'}
+
+
+def _spending_patterns_params(params):
+    try:
+        months = int(params.get('months', 12))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid 'months', expected an integer")
+    if not 1 <= months <= MAX_SUMMARY_MONTHS:
+        raise ValueError(f"'months' must be between 1 and {MAX_SUMMARY_MONTHS}")
+    return {'months': months}
+
+
+# kind -> (validate and normalize the params, build the report from them)
+REPORT_KINDS = {
+    'budget_summary': (
+        _budget_summary_params,
+        lambda p: calculate_budget_summary_range(parse_month(p['from'], 'from'), parse_month(p['to'], 'to'))
+    ),
+    'spending_patterns': (
+        _spending_patterns_params,
+        lambda p: analyze_spending_patterns(p['months'])
+    ),
+}
+
+
+def parse_report_request(data):
+    """Validate a POST /api/reports payload into (kind, params). Raises ValueError."""
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object')
+    kind = data.get('kind')
+    if kind not in REPORT_KINDS:
+        raise ValueError(f"Invalid kind {kind!r}, expected one of {', '.join(REPORT_KINDS)}")
+    params = data.get('params') or {}
+    if not isinstance(params, dict):
+        raise ValueError("'params' must be an object")
+    return kind, REPORT_KINDS[kind][0](params)
+
+
+def purge_expired_reports():
+    db.session.execute(delete(ReportJob).where(ReportJob.expires_at < datetime.utcnow()))
+
+
+def create_report_job(kind, params, ttl_seconds):
+    purge_expired_reports()
+    now = datetime.utcnow()
+    job = ReportJob(
+        id=uuid.uuid4().hex, kind=kind, params=json.dumps(params), status='queued',
+        created_at=now, expires_at=now + timedelta(seconds=ttl_seconds)
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def get_report_job(job_id, stale_seconds):
+    """The job, or None if it does not exist or has expired. Marks stale jobs failed."""
+    job = db.session.get(ReportJob, job_id)
+    now = datetime.utcnow()
+    if job is None or job.expires_at < now:
+        return None
+    stale_before = now - timedelta(seconds=stale_seconds)
+    if job.status == 'queued' and job.created_at < stale_before:
+        _fail_stale_job(job, 'Report was never started; the server may have restarted, try again')
+    elif job.status == 'running' and (job.started_at or job.created_at) < stale_before:
+        _fail_stale_job(job, 'Report did not finish; the server may have restarted, try again')
+    return job
+
+
+def _fail_stale_job(job, error):
+    job.status = 'failed'
+    job.error = error
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def run_report_job(app, account, job_id):
+    """Worker entry point: build the report inside an app context bound to the job's account."""
+    with app.app_context():
+        g.account = account
+        job = db.session.get(ReportJob, job_id)
+        if job is None or job.status != 'queued':
+            # Expired, or given up on as stale while it waited
+            return
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+        try:
+            result = REPORT_KINDS[job.kind][1](json.loads(job.params))
+            job.result = app.json.dumps(result)
+            job.status = 'done'
+        except Exception as e:
+            logging.error(f"Report {job_id} ({job.kind}) failed: {str(e)}")
+            db.session.rollback()
+            job.status = 'failed'
+            job.error = str(e)[:500]
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+
+def report_job_dict(job):
+    data = {
+        'id': job.id,
+        'kind': job.kind,
+        'params': json.loads(job.params),
+        'status': job.status,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+        'expires_at': job.expires_at
+    }
+    if job.status == 'done':
+        data['result'] = json.loads(job.result)
+    elif job.status == 'failed':
+        data['error'] = job.error
+    return data
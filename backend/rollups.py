@@ -0,0 +1,59 @@
+# backend/rollups.py
+
+from collections import defaultdict
+from models import db, Transaction, MonthlyRollup
+from cache import bump_data_version
+from money import to_paise, from_paise
+from sqlalchemy import func, cast, select, insert, delete, Integer
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+
+def update_rollups(changes):
+    """Fold transaction changes into the monthly rollup table.
+
+    `changes` is an iterable of (date, category, amount, sign) tuples where sign is
+    +1 for a row being added and -1 for a row being removed. Runs inside the
+    caller's session so it commits (or rolls back) together with the write.
+    """
+    # Summed in paise so a batch's delta is exact however many amounts go into it
+    deltas = defaultdict(lambda: [0, 0])
+    for date, category, amount, sign in changes:
+        delta = deltas[(date.year, date.month, category)]
+        delta[0] += sign * to_paise(amount)
+        delta[1] += sign
+
+    rows = [
+        {'year': year, 'month': month, 'category': category, 'total': from_paise(total), 'count': count}
+        for (year, month, category), (total, count) in deltas.items() if count or total
+    ]
+    if not rows:
+        return
+
+    stmt = sqlite_insert(MonthlyRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MonthlyRollup.year, MonthlyRollup.month, MonthlyRollup.category],
+        set_={
+            'total': MonthlyRollup.total + stmt.excluded.total,
+            'count': MonthlyRollup.count + stmt.excluded.count
+        }
+    )
+    db.session.execute(stmt)
+    # Drop buckets whose last transaction went away so they don't show up as zero rows
+    db.session.execute(delete(MonthlyRollup).where(MonthlyRollup.count <= 0))
+
+
+def rebuild_rollups():
+    """Recompute the rollup table from scratch out of the raw transactions."""
+    year = cast(func.strftime('%Y', Transaction.date), Integer)
+    month = cast(func.strftime('%m', Transaction.date), Integer)
+
+    db.session.execute(delete(MonthlyRollup))
+    db.session.execute(insert(MonthlyRollup).from_select(
+        ['year', 'month', 'category', 'total', 'count'],
+        select(
+            year, month, Transaction.category,
+            func.sum(Transaction.amount), func.count(Transaction.id)
+        ).group_by(year, month, Transaction.category)
+    ))
+    bump_data_version()
+    db.session.commit()
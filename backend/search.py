@@ -0,0 +1,90 @@
+# backend/search.py
+#
+# Full-text search over transaction descriptions. transactions_fts is an external
+# content FTS5 table: it stores only the index and reads descriptions back from the
+# transactions table, with triggers keeping the two in step.
+
+import base64
+import re
+from sqlalchemy import and_, column, or_, table, text
+from models import db, Transaction
+
+transactions_fts = table('transactions_fts', column('rowid'), column('rank'), column('transactions_fts'))
+
+FTS_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5("
+    "description, content='transactions', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN "
+    "INSERT INTO transactions_fts(rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, description) VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+    "INSERT INTO transactions_fts(rowid, description) VALUES (new.id, new.description); END",
+]
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def create_search_schema():
+    """Create the FTS table and its triggers if missing."""
+    for statement in FTS_SCHEMA:
+        db.session.execute(text(statement))
+
+
+def create_search_index():
+    """Create the FTS table and its triggers if missing, then reindex every description."""
+    create_search_schema()
+    db.session.execute(text("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')"))
+
+
+def match_expression(q):
+    """Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Words are quoted so user input can never be read as FTS5 syntax (AND, NEAR, column
+    filters, unbalanced quotes).
+    """
+    tokens = _TOKEN.findall(q or '')
+    if not tokens:
+        raise ValueError("Missing search text 'q'")
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def encode_search_cursor(rank, transaction_id):
+    raw = f"{rank!r}|{transaction_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_search_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        rank, id_str = raw.rsplit('|', 1)
+        return float(rank), int(id_str)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid 'cursor'")
+
+
+def search_query(q):
+    """Transactions matching `q` with their bm25 rank (lower is better), unordered."""
+    return db.session.query(
+        Transaction.id, Transaction.date, Transaction.amount,
+        Transaction.category, Transaction.description, transactions_fts.c.rank
+    ).join(
+        transactions_fts, transactions_fts.c.rowid == Transaction.id
+    ).filter(
+        transactions_fts.c.transactions_fts.op('MATCH')(match_expression(q))
+    )
+
+
+def paginate_search(query, limit, cursor=None):
+    """Keyset-paginate best match first on (rank, id); returns the page and the next cursor."""
+    if cursor:
+        cursor_rank, cursor_id = decode_search_cursor(cursor)
+        query = query.filter(or_(
+            transactions_fts.c.rank > cursor_rank,
+            and_(transactions_fts.c.rank == cursor_rank, Transaction.id > cursor_id)
+        ))
+    rows = query.order_by(transactions_fts.c.rank, Transaction.id).limit(limit + 1).all()
+    next_cursor = encode_search_cursor(rows[limit - 1].rank, rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_cursor
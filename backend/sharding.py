@@ -0,0 +1,132 @@
+# backend/sharding.py
+#
+# Per-account data partitioning. Each account lives in its own SQLite file, so there is
+# no owner column to filter on and nothing to forget: the session simply binds to the
+# requesting account's engine. Writes for different accounts take different file locks
+# and proceed in parallel, and every query (analysis included) only ever sees one
+# account's rows.
+#
+# The account comes from the X-Account-Id header. Requests without one use the
+# 'default' account, which is the app's own SQLALCHEMY_DATABASE_URI (finance.db).
+# Other accounts' files are only ever created explicitly (POST /api/accounts or
+# `flask init-db --account`); engines open them read-write without the create flag,
+# so no request can leave a file behind for an account id nobody registered.
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from urllib.parse import quote
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from database import configure_sqlite
+
+ACCOUNT_HEADER = 'X-Account-Id'
+DEFAULT_ACCOUNT = 'default'
+_ACCOUNT_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def parse_account(value):
+    """Validate an account id; it becomes a file name, so only a safe alphabet is allowed."""
+    if not value:
+        return DEFAULT_ACCOUNT
+    if not _ACCOUNT_ID.match(value):
+        raise ValueError(f"Invalid {ACCOUNT_HEADER}, expected 1-64 letters, digits, '-' or '_'")
+    return value
+
+
+def current_account():
+    if has_app_context():
+        return g.get('account', DEFAULT_ACCOUNT)
+    return DEFAULT_ACCOUNT
+
+
+class ShardRouter:
+    """Maps accounts to engines, one SQLite file per account.
+
+    At most `max_open` shard engines stay open; the least recently used one is disposed
+    when another is needed (connections still checked out close once returned).
+    """
+
+    def __init__(self, directory, pragmas=None, engine_options=None, max_open=64):
+        self.directory = directory
+        self.pragmas = pragmas
+        self.engine_options = engine_options or {}
+        self.max_open = max_open
+        self._engines = OrderedDict()
+        self._ready = set()
+        self._lock = threading.Lock()
+        self._init_locks = {}
+
+    def path_for(self, account):
+        return os.path.join(self.directory, f'{account}.db')
+
+    def exists(self, account):
+        return account == DEFAULT_ACCOUNT or os.path.exists(self.path_for(account))
+
+    def create(self, account, init):
+        """Create an account's database file and run `init` in it; False if it already exists."""
+        if account == DEFAULT_ACCOUNT:
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            # O_EXCL, so of two concurrent creates (in any process) exactly one wins.
+            # An empty file is a valid, empty SQLite database.
+            os.close(os.open(self.path_for(account), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+        except FileExistsError:
+            return False
+        self.ensure_ready(account, init)
+        return True
+
+    def engine_for(self, account):
+        """The engine for a non-default account; None means the app's own engine."""
+        if account == DEFAULT_ACCOUNT:
+            return None
+        with self._lock:
+            engine = self._engines.get(account)
+            if engine is not None:
+                self._engines.move_to_end(account)
+                return engine
+            # mode=rw: connecting to a missing file fails instead of creating it
+            url = f'sqlite:///file:{quote(os.path.abspath(self.path_for(account)))}?mode=rw&uri=true'
+            engine = create_engine(url, **self.engine_options)
+            configure_sqlite(engine, self.pragmas)
+            self._engines[account] = engine
+            while len(self._engines) > self.max_open:
+                _, evicted = self._engines.popitem(last=False)
+                evicted.dispose()
+            return engine
+
+    def ensure_ready(self, account, init):
+        """Run `init` (schema migrations and seeding) once per account per process."""
+        if account in self._ready:
+            return
+        with self._lock:
+            lock = self._init_locks.setdefault(account, threading.Lock())
+        with lock:
+            if account not in self._ready:
+                init()
+                self._ready.add(account)
+
+    def mark_ready(self, account):
+        self._ready.add(account)
+
+    def dispose(self):
+        """Drop pooled connections, e.g. in a freshly forked worker."""
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose(close=False)
+            self._engines.clear()
+
+
+class ShardedSession(Session):
+    """Session that sends every statement to the current account's database."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            router = current_app.extensions.get('shard_router')
+            engine = router.engine_for(current_account()) if router is not None else None
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
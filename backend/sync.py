@@ -0,0 +1,118 @@
+# backend/sync.py
+#
+# Change feed for clients that keep their own copy of the transactions. A sync round
+# starts without a cursor (full download) or with the cursor the previous round ended
+# on, pages through every row whose updated_at is newer, and finishes with the ids
+# deleted in the meantime plus a cursor for the next round. Transaction listings also
+# hand out a cursor, so a client can keep one page fresh without downloading the rest.
+#
+# Timestamps are taken when a statement runs, not when its transaction commits, so a
+# slow writer can commit rows stamped slightly before a cursor that has already been
+# handed out. Each round therefore re-reads SYNC_OVERLAP worth of changes; clients
+# apply rows by id, so seeing one twice is harmless.
+
+import base64
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects.sqlite import insert
+from models import db, Transaction, TransactionTombstone
+
+SYNC_OVERLAP = timedelta(seconds=30)
+MAX_CHANGES = 5000
+
+
+def record_tombstones(ids):
+    """Mark transaction ids as deleted now; call in the same session as the delete."""
+    ids = list(ids)
+    if not ids:
+        return
+    now = datetime.utcnow()
+    stmt = insert(TransactionTombstone).values([{'id': i, 'deleted_at': now} for i in ids])
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[TransactionTombstone.id],
+        set_={'deleted_at': stmt.excluded.deleted_at}
+    ))
+
+
+def _encode_time(value):
+    return value.isoformat() if value else ''
+
+
+def _decode_time(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def encode_sync_cursor(since, started, after=None):
+    """Pack the round's lower bound, its start time and (mid-round) the last row sent."""
+    after_time, after_id = after or (None, '')
+    raw = '|'.join([_encode_time(since), _encode_time(started), _encode_time(after_time), str(after_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def current_sync_cursor():
+    """Cursor for a round that starts now; hand it out with a snapshot read just after it."""
+    now = datetime.utcnow()
+    return encode_sync_cursor(now, now)
+
+
+def decode_sync_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        since, started, after_time, after_id = raw.split('|')
+        after = (_decode_time(after_time), int(after_id)) if after_time else None
+        started = _decode_time(started)
+        if started is None:
+            raise ValueError
+        return _decode_time(since), started, after
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid 'since' cursor")
+
+
+def changes_since(cursor=None, limit=MAX_CHANGES):
+    """Return one page of the change feed.
+
+    The result holds the changed rows, the deleted ids (only on a round's last page),
+    the cursor to send next and whether the round has more pages.
+    """
+    since, started, after = decode_sync_cursor(cursor) if cursor else (None, None, None)
+    if after is None:
+        # A new round covers everything up to now, and the next one starts from here.
+        # Only a round's later pages keep the start time their cursor carries.
+        started = datetime.utcnow()
+
+    query = db.session.query(
+        Transaction.id, Transaction.date, Transaction.amount,
+        Transaction.category, Transaction.description, Transaction.updated_at
+    )
+    if since is not None:
+        query = query.filter(Transaction.updated_at > since - SYNC_OVERLAP)
+    if after is not None:
+        after_time, after_id = after
+        query = query.filter(or_(
+            Transaction.updated_at > after_time,
+            and_(Transaction.updated_at == after_time, Transaction.id > after_id)
+        ))
+    rows = query.order_by(Transaction.updated_at, Transaction.id).limit(limit + 1).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        return {
+            'changes': rows,
+            'deleted': [],
+            'cursor': encode_sync_cursor(since, started, (last.updated_at, last.id)),
+            'has_more': True
+        }
+
+    deleted = []
+    if since is not None:
+        # A tombstone is stale when its id was reused by a row written after the delete
+        revived = db.session.query(Transaction.id).filter(
+            Transaction.id == TransactionTombstone.id,
+            Transaction.updated_at >= TransactionTombstone.deleted_at
+        ).exists()
+        deleted = [i for i, in db.session.query(TransactionTombstone.id).filter(
+            TransactionTombstone.deleted_at > since - SYNC_OVERLAP, ~revived
+        )]
+    # Anything stamped after the round started is picked up by the next one
+    return {'changes': rows, 'deleted': deleted, 'cursor': encode_sync_cursor(started, started), 'has_more': False}
@@ -0,0 +1,31 @@
+# backend/tests/conftest.py
+#
+# The backend modules import each other by bare name (from models import db), so the
+# backend directory goes on sys.path. Run with:  cd backend && python -m pytest
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from migrations import init_database  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'finance.db'}",
+        'ACCOUNTS_DIR': str(tmp_path / 'accounts'),
+        'TESTING': True
+    })
+    with app.app_context():
+        init_database()
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,44 @@
+# backend/tests/test_accounts.py
+import os
+
+ALICE = {'X-Account-Id': 'alice'}
+
+
+def account_files(app):
+    directory = app.config['ACCOUNTS_DIR']
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+
+def test_unknown_accounts_are_not_created_by_requests(app, client):
+    assert client.get('/api/transactions', headers=ALICE).status_code == 404
+    response = client.post('/api/transactions', headers=ALICE,
+                           json={'date': '2026-10-01', 'amount': 5, 'category': 'Food'})
+    assert response.status_code == 404
+    assert client.get('/api/accounts/alice').status_code == 404
+    assert not any(name.startswith('alice') for name in account_files(app))
+
+
+def test_created_account_is_separate_from_default(app, client):
+    assert client.post('/api/accounts', json={'account': 'alice'}).status_code == 201
+    assert client.post('/api/accounts', json={'account': 'alice'}).status_code == 409
+    assert client.get('/api/accounts/alice').get_json() == {'account': 'alice'}
+
+    client.post('/api/transactions', headers=ALICE, json={'date': '2026-10-01', 'amount': 5, 'category': 'Food'})
+    assert len(client.get('/api/transactions', headers=ALICE).get_json()['transactions']) == 1
+    assert client.get('/api/transactions').get_json()['transactions'] == []
+    assert 'Food' in client.get('/api/categories', headers=ALICE).get_json()
+
+
+def test_account_ids_are_validated(client):
+    assert client.post('/api/accounts', json={'account': '../etc'}).status_code == 400
+    assert client.post('/api/accounts', json={}).status_code == 400
+    assert client.get('/api/transactions', headers={'X-Account-Id': '../etc'}).status_code == 400
+
+
+def test_cli_creates_accounts_explicitly(app):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['rebuild-rollups', '--account', 'bob'])
+    assert result.exit_code != 0 and 'Unknown account' in result.output
+    result = runner.invoke(args=['init-db', '--account', 'bob'])
+    assert result.exit_code == 0 and "Created account 'bob'" in result.output
+    assert runner.invoke(args=['rebuild-rollups', '--account', 'bob']).exit_code == 0
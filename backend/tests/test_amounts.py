@@ -0,0 +1,27 @@
+# backend/tests/test_amounts.py
+from sqlalchemy import text
+
+from migrations import convert_to_paise
+from models import db
+
+
+def test_convert_to_paise_rounds_like_the_api(app):
+    with app.app_context():
+        # As rebuild_table leaves it: an INTEGER column still holding the old rupee values
+        db.session.execute(text('CREATE TABLE legacy_amounts (amount INTEGER NOT NULL)'))
+        db.session.execute(text('INSERT INTO legacy_amounts (amount) VALUES (:amount)'),
+                           [{'amount': a} for a in (1.005, 0.1, 1234.56, 2.675, -0.015, 7)])
+        convert_to_paise('legacy_amounts', 'amount')
+        rows = db.session.execute(text('SELECT amount, typeof(amount) FROM legacy_amounts ORDER BY rowid')).all()
+    assert rows == [(101, 'integer'), (10, 'integer'), (123456, 'integer'), (268, 'integer'),
+                    (-2, 'integer'), (700, 'integer')]
+
+
+def test_update_rejects_non_finite_amounts(client):
+    created = client.post('/api/transactions', json={'date': '2026-10-01', 'amount': 5, 'category': 'Food'})
+    transaction_id = created.get_json()['id']
+    for amount in ('inf', 'nan', '-Infinity', 1e300, 'abc', None):
+        response = client.put(f'/api/transactions/{transaction_id}', json={'amount': amount})
+        assert response.status_code == 400, amount
+    assert client.put(f'/api/transactions/{transaction_id}', json={'amount': '1.005'}).status_code == 200
+    assert client.get('/api/transactions').get_json()['transactions'][0]['amount'] == 1.01
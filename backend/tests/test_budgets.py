@@ -0,0 +1,40 @@
+# backend/tests/test_budgets.py
+from datetime import datetime
+
+
+def budget_amounts(client, month=None):
+    response = client.get('/api/budget', query_string={'month': month} if month else None)
+    return {b['category']: b['amount'] for b in response.get_json()}
+
+
+def test_undated_budget_replaces_monthly_versions(client):
+    this_month = datetime.now().strftime('%Y-%m')
+    client.post('/api/budget', json={'budgets': [{'category': 'Food', 'budget': 3000}], 'month': this_month})
+    client.post('/api/budget', json={'budgets': [{'category': 'Food', 'budget': 4000}], 'month': '2030-01'})
+    assert budget_amounts(client)['Food'] == 3000
+    assert budget_amounts(client, '2030-02')['Food'] == 4000
+
+    response = client.post('/api/budget', json={'budgets': [{'category': 'Food', 'budget': 5000}]})
+    assert response.status_code == 201
+    assert budget_amounts(client)['Food'] == 5000
+    assert budget_amounts(client, '2030-02')['Food'] == 5000
+    summary = client.get('/api/analysis/budget_summary').get_json()
+    assert {c['category']: c['budget'] for c in summary['categories']}['Food'] == 5000
+
+
+def test_budget_lists_version_only_categories(client):
+    client.post('/api/budget', json={'budgets': [{'category': 'Food', 'budget': 1000}]})
+    client.post('/api/budget', json={'budgets': [{'category': 'Debt', 'budget': 700}], 'month': '2026-01'})
+    budgets = {b['category']: b for b in client.get('/api/budget', query_string={'month': '2026-03'}).get_json()}
+    assert budgets['Debt']['amount'] == 700 and budgets['Debt']['default'] is None and budgets['Debt']['id'] is None
+    assert budgets['Food']['amount'] == 1000 and budgets['Food']['default'] == 1000
+    assert 'Debt' not in budget_amounts(client, '2025-12')
+    assert client.get('/api/budget', query_string={'month': 'March'}).status_code == 400
+
+
+def test_bulk_budgets_reject_a_reversed_range(client):
+    response = client.post('/api/budget/bulk', json={
+        'budgets': [{'category': 'Food', 'budget': 3000}], 'from': '2026-12', 'to': '2026-01'
+    })
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "'from' must not be after 'to'"
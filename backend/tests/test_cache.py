@@ -0,0 +1,46 @@
+# backend/tests/test_cache.py
+import shutil
+
+from app import create_app
+from migrations import init_database
+
+
+def make_app(directory):
+    directory.mkdir()
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{directory / 'finance.db'}",
+        'ACCOUNTS_DIR': str(directory / 'accounts'),
+        'TESTING': True
+    })
+    with app.app_context():
+        init_database()
+    return app
+
+
+def spent(client):
+    return client.get('/api/analysis/budget_summary').get_json()['total_spent']
+
+
+def test_apps_do_not_share_cached_responses(tmp_path):
+    first, second = make_app(tmp_path / 'a'), make_app(tmp_path / 'b')
+    for app, amount in ((first, 111), (second, 222)):
+        client = app.test_client()
+        client.post('/api/transactions', json={'date': '2026-10-01', 'amount': amount, 'category': 'Food'})
+    # Both databases are at data version 1
+    assert spent(first.test_client()) == 111
+    assert spent(second.test_client()) == 222
+
+
+def test_recreated_account_is_not_served_from_cache(app, client):
+    alice = {'X-Account-Id': 'alice'}
+    client.post('/api/accounts', json={'account': 'alice'})
+    client.post('/api/transactions', headers=alice, json={'date': '2026-10-01', 'amount': 111, 'category': 'Food'})
+    assert client.get('/api/analysis/budget_summary', headers=alice).get_json()['total_spent'] == 111
+
+    # Delete the account and create it again, then bring it back to the same data version
+    app.extensions['shard_router'].dispose()
+    shutil.rmtree(app.config['ACCOUNTS_DIR'])
+    app.extensions['shard_router']._ready.discard('alice')
+    client.post('/api/accounts', json={'account': 'alice'})
+    client.post('/api/transactions', headers=alice, json={'date': '2026-10-01', 'amount': 222, 'category': 'Food'})
+    assert client.get('/api/analysis/budget_summary', headers=alice).get_json()['total_spent'] == 222
@@ -0,0 +1,73 @@
+# backend/tests/test_categorizer.py
+import random
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from categorizer import Matcher, required_literals, rule_values
+
+
+def random_rules(rng, count):
+    def word():
+        return ''.join(rng.choice('abcdefgh') for _ in range(rng.randint(3, 6)))
+
+    regexes = [
+        lambda: word() + r'[0-9]+',
+        lambda: f'(?:{word()}|{word()})\\s*\\d',
+        lambda: f'{word()}.*{word()}',
+        lambda: f'\\b{word()}\\b',
+    ]
+    return [SimpleNamespace(
+        id=i + 1,
+        kind='regex' if i % 2 else 'keyword',
+        pattern=rng.choice(regexes)() if i % 2 else word(),
+        category=f'C{i % 7}',
+        priority=rng.randint(0, 3)
+    ) for i in range(count)], word
+
+
+def reference_match(rules, text):
+    """Try every rule in rank order."""
+    for rule in sorted(rules, key=lambda r: (-r.priority, r.id)):
+        if rule.kind == 'keyword':
+            if rule.pattern.casefold() in text.casefold():
+                return rule.category
+        elif re.search(rule.pattern, text, re.IGNORECASE | re.DOTALL):
+            return rule.category
+    return None
+
+
+def test_matcher_agrees_with_trying_every_rule():
+    rng = random.Random(7)
+    rules, word = random_rules(rng, 400)
+    matcher = Matcher(rules)
+    for _ in range(2000):
+        text = ' '.join(rng.choice([word(), word() + str(rng.randint(0, 99)), 'POS']) for _ in range(5))
+        text = rng.choice([text, text.upper()])
+        assert matcher.match(text) == reference_match(rules, text), text
+
+
+def test_regex_literal_prefilter_keeps_case_insensitive_matches():
+    rules = [SimpleNamespace(id=1, kind='regex', pattern=r'upi/\d+/rent', category='Housing', priority=0)]
+    matcher = Matcher(rules)
+    assert matcher.match('UPI/123/RENT OCT') == 'Housing'
+    assert matcher.match('İNR UPI/9/Rent') == 'Housing'
+    assert matcher.match('UPI/abc/RENT') is None
+
+
+@pytest.mark.parametrize('pattern, literals', [
+    (r'UPI/\d+/RENT', ['/rent']),
+    (r'(?:salary|wage)s?', ['salary', 'wage']),
+    (r'(acme)+ corp', [' corp']),
+    (r'\d{6}', []),
+    (r'netflix|\d+', []),
+])
+def test_required_literals(pattern, literals):
+    assert required_literals(pattern) == literals
+
+
+def test_regex_rules_need_a_literal():
+    with pytest.raises(ValueError, match='literal'):
+        rule_values({'kind': 'regex', 'pattern': r'\d{6}', 'category': 'Food'}, {'Food'})
+    assert rule_values({'kind': 'regex', 'pattern': r'UPI/\d+', 'category': 'Food'}, {'Food'})['pattern'] == r'UPI/\d+'
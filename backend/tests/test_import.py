@@ -0,0 +1,53 @@
+# backend/tests/test_import.py
+import io
+import json
+
+import importer
+from importer import iter_lines
+from models import Transaction
+
+
+def ndjson(rows):
+    return '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows).encode()
+
+
+def test_lines_split_only_on_line_breaks():
+    text = 'a b\x0cc\r\nd\re\nf'.encode()
+    for chunk_size in (1, 2, 3, 64):
+        assert list(iter_lines(io.BytesIO(text), chunk_size)) == ['a b\x0cc\r\n', 'd\r', 'e\n', 'f']
+
+
+def test_ndjson_strings_may_hold_unicode_line_separators(client):
+    body = ndjson([{'date': '2026-10-01', 'amount': 5, 'category': 'Food', 'description': 'tea stall\x85'}])
+    summary = client.post('/api/transactions/bulk?format=ndjson', data=body).get_json()
+    assert (summary['inserted'], summary['failed']) == (1, 0)
+    assert client.get('/api/transactions').get_json()['transactions'][0]['description'] == 'tea stall\x85'
+
+
+def test_failed_batch_is_reported_and_others_are_kept(client, monkeypatch):
+    monkeypatch.setattr(importer, 'BATCH_SIZE', 2)
+    insert_batch = importer._insert_batch
+
+    def fail_second(batch, calls=[]):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError('disk full')
+        insert_batch(batch)
+
+    monkeypatch.setattr(importer, '_insert_batch', fail_second)
+    rows = [{'date': '2026-10-01', 'amount': i + 1, 'category': 'Food'} for i in range(5)]
+    summary = client.post('/api/transactions/bulk?format=ndjson', data=ndjson(rows)).get_json()
+    assert (summary['inserted'], summary['failed']) == (3, 2)
+    assert summary['errors'] == [{'line': 3, 'error': 'Rows on lines 3-4 were not saved: disk full'}]
+    assert len(client.get('/api/transactions').get_json()['transactions']) == 3
+
+
+def test_unreadable_body_reports_rows_already_saved(app, client):
+    # Larger than one read, so batches are saved before the bad bytes are reached
+    rows = [{'date': '2026-10-01', 'amount': i + 1, 'category': 'Food'} for i in range(3000)]
+    response = client.post('/api/transactions/bulk?format=ndjson', data=ndjson(rows) + b'\n\xff\xfe\n')
+    assert response.status_code == 400
+    summary = response.get_json()
+    assert 'error' in summary and summary['inserted'] > 0
+    with app.app_context():
+        assert Transaction.query.count() == summary['inserted']
@@ -0,0 +1,22 @@
+# backend/tests/test_metrics.py
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from models import db
+
+
+def test_failed_statements_leave_no_timer_behind(app):
+    with db.engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text('SELECT * FROM no_such_table'))
+        assert conn.execute(text('SELECT 1')).scalar() == 1
+        assert not conn.info.get('query_started')
+
+
+def test_server_timing_counts_queries(client):
+    response = client.get('/api/transactions')
+    timings = response.headers.getlist('Server-Timing')
+    assert any(t.startswith('db;') and 'queries' in t and '"0 queries"' not in t for t in timings)
@@ -0,0 +1,21 @@
+# backend/tests/test_queries.py
+
+import pytest
+
+
+@pytest.mark.parametrize('method, path, params', [
+    ('get', '/api/transactions', {}),
+    ('get', '/api/transactions/search', {'q': 'rent'}),
+    ('get', '/api/transactions/export', {}),
+    ('post', '/api/transactions/recategorize', {}),
+])
+def test_last_representable_day_is_rejected(client, method, path, params):
+    response = getattr(client, method)(path, query_string=dict(params, to='9999-12-31'))
+    assert response.status_code == 400
+    assert 'to' in response.get_json()['error']
+
+
+def test_to_is_inclusive(client):
+    client.post('/api/transactions', json={'date': '2026-03-31T23:30:00', 'amount': 10, 'category': 'Food'})
+    listed = client.get('/api/transactions', query_string={'to': '2026-03-31'}).get_json()
+    assert len(listed['transactions']) == 1
@@ -0,0 +1,41 @@
+# backend/tests/test_reports.py
+from datetime import datetime, timedelta
+
+from models import db, ReportJob
+from reports import create_report_job, run_report_job
+
+
+def add_job(app, status='queued', age=0):
+    """A job row whose worker never picked it up (or died), submitted `age` seconds ago."""
+    with app.app_context():
+        job = create_report_job('spending_patterns', {'months': 12}, 3600)
+        job.status = status
+        job.created_at = datetime.utcnow() - timedelta(seconds=age)
+        if status == 'running':
+            job.started_at = job.created_at
+        db.session.commit()
+        return job.id
+
+
+def test_stale_jobs_are_reported_failed(app, client):
+    app.config['REPORT_STALE_SECONDS'] = 60
+    fresh = add_job(app, 'queued', age=10)
+    lost = add_job(app, 'queued', age=120)
+    dead = add_job(app, 'running', age=120)
+
+    assert client.get(f'/api/reports/{fresh}').get_json()['status'] == 'queued'
+    for job_id in (lost, dead):
+        body = client.get(f'/api/reports/{job_id}').get_json()
+        assert body['status'] == 'failed' and 'restarted' in body['error']
+
+    # A worker that reaches a job given up on leaves it failed
+    run_report_job(app, 'default', lost)
+    with app.app_context():
+        assert db.session.get(ReportJob, lost).status == 'failed'
+
+
+def test_report_records_start_time(app, client):
+    job_id = add_job(app)
+    run_report_job(app, 'default', job_id)
+    body = client.get(f'/api/reports/{job_id}').get_json()
+    assert body['status'] == 'done' and body['started_at'] is not None
@@ -0,0 +1,75 @@
+# backend/tests/test_spending_patterns.py
+import json
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+import finance
+from finance import analyze_spending_patterns
+from money import from_paise, to_paise
+
+NOW = datetime(2026, 10, 17, 15, 30)
+CATEGORIES = ['Food', 'Housing', 'Debt', 'Utilities']
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+
+def reference_patterns(transactions, months):
+    """The original row-by-row aggregation, summed in paise."""
+    window_start = NOW - relativedelta(months=months)
+    monthly_spending = defaultdict(lambda: defaultdict(int))
+    category_totals = defaultdict(int)
+    for date, amount, category in transactions:
+        if date >= window_start:
+            monthly_spending[date.strftime('%Y-%m')][category] += to_paise(amount)
+            category_totals[category] += to_paise(amount)
+    categories = sorted(category_totals)
+    return {
+        'by_date': [{
+            'month': month,
+            'spending': [from_paise(monthly_spending[month].get(category, 0)) for category in categories]
+        } for month in sorted(monthly_spending)],
+        'by_category': [{'category': cat, 'total': from_paise(category_totals[cat])} for cat in categories]
+    }
+
+
+@pytest.fixture
+def transactions(client, monkeypatch):
+    monkeypatch.setattr(finance, 'datetime', FrozenDatetime)
+    rng = random.Random(3)
+    seeded = []
+    for _ in range(400):
+        date = NOW - timedelta(days=rng.randint(0, 420), minutes=rng.randint(0, 1439))
+        seeded.append((date, round(rng.uniform(1, 5000), 2), rng.choice(CATEGORIES)))
+    # Either side of every window's start, which falls part-way through a month
+    for months in (1, 3, 6, 12):
+        start = NOW - relativedelta(months=months)
+        seeded += [(start - timedelta(minutes=1), 11.11, 'Food'), (start, 22.22, 'Debt'),
+                   (start + timedelta(minutes=1), 33.33, 'Housing')]
+    ndjson = '\n'.join(json.dumps({'date': date.isoformat(), 'amount': amount, 'category': category})
+                       for date, amount, category in seeded)
+    response = client.post('/api/transactions/bulk', query_string={'format': 'ndjson'}, data=ndjson)
+    assert response.get_json()['inserted'] == len(seeded)
+    return seeded
+
+
+@pytest.mark.parametrize('months', [1, 3, 6, 12])
+def test_matches_row_by_row_reference(app, transactions, months):
+    with app.app_context():
+        result = analyze_spending_patterns(months)
+    assert result == reference_patterns(transactions, months)
+    # The oldest month in the window is only partly covered
+    assert result['by_date'][0]['month'] == (NOW - relativedelta(months=months)).strftime('%Y-%m')
+
+
+@pytest.mark.parametrize('months', ['0', '121', '30000', 'x'])
+def test_months_out_of_range_is_rejected(client, months):
+    response = client.get('/api/analysis/spending_patterns', query_string={'months': months})
+    assert response.status_code == 400
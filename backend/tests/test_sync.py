@@ -0,0 +1,48 @@
+# backend/tests/test_sync.py
+
+import time
+from datetime import timedelta
+from sync import decode_sync_cursor
+
+
+def sync_round(client, cursor=None):
+    """Page through one sync round and return (changed ids, deleted ids, final cursor)."""
+    changed, deleted = [], []
+    while True:
+        page = client.get('/api/transactions/changes', query_string={'since': cursor} if cursor else None).get_json()
+        changed += [row['id'] for row in page['changes']]
+        deleted += page['deleted']
+        cursor = page['cursor']
+        if not page['has_more']:
+            return changed, deleted, cursor
+
+
+def test_cursor_moves_forward_every_round(client):
+    client.post('/api/transactions', json={'date': '2026-01-05', 'amount': 10, 'category': 'Food'})
+    _, _, first = sync_round(client)
+    time.sleep(0.01)
+    _, _, second = sync_round(client, first)
+    time.sleep(0.01)
+    _, _, third = sync_round(client, second)
+
+    starts = [decode_sync_cursor(c)[1] for c in (first, second, third)]
+    assert starts[0] < starts[1] < starts[2]
+
+
+def test_later_rounds_only_return_recent_changes(client, monkeypatch):
+    monkeypatch.setattr('sync.SYNC_OVERLAP', timedelta(0))
+    ids = [client.post('/api/transactions', json={'date': '2026-01-05', 'amount': i, 'category': 'Food'}).get_json()['id']
+           for i in range(1, 4)]
+    changed, _, cursor = sync_round(client)
+    assert sorted(changed) == ids
+
+    time.sleep(0.01)
+    client.delete(f'/api/transactions/{ids[0]}')
+    new_id = client.post('/api/transactions', json={'date': '2026-01-06', 'amount': 5, 'category': 'Food'}).get_json()['id']
+    changed, deleted, cursor = sync_round(client, cursor)
+    assert changed == [new_id]
+    assert deleted == [ids[0]]
+
+    time.sleep(0.01)
+    changed, deleted, _ = sync_round(client, cursor)
+    assert changed == [] and deleted == []
@@ -0,0 +1,36 @@
+# backend/tests/test_timeseries.py
+import json
+
+import pyarrow as pa
+
+from arrow_io import ARROW_STREAM_MIMETYPE
+
+
+def test_category_names_cannot_replace_arrow_columns(client):
+    for category, amount in (('bucket', 10), ('_total', 20), ('Food', 30)):
+        client.post('/api/transactions', json={'date': '2026-10-02', 'amount': amount, 'category': category})
+    response = client.get('/api/analysis/timeseries', headers={'Accept': ARROW_STREAM_MIMETYPE},
+                          query_string={'granularity': 'month', 'from': '2026-09-01', 'to': '2026-10-31'})
+    table = pa.ipc.open_stream(response.data).read_all()
+    prefix = json.loads(table.schema.metadata[b'category_prefix'])
+
+    assert table.column('bucket').type == pa.timestamp('s')
+    assert table.column('_total').to_pylist() == [0, 60]
+    assert {name[len(prefix):]: table.column(name).to_pylist()
+            for name in table.column_names if name.startswith(prefix)} == {
+        'bucket': [0, 10], '_total': [0, 20], 'Food': [0, 30]
+    }
+
+
+def test_range_ending_on_the_last_representable_day_is_rejected(client):
+    for granularity in ('day', 'week', 'month'):
+        response = client.get('/api/analysis/timeseries',
+                              query_string={'granularity': granularity, 'from': '9999-12-01', 'to': '9999-12-31'})
+        assert response.status_code == 400
+
+
+def test_range_starting_on_the_first_day(client):
+    for granularity in ('day', 'week', 'month'):
+        response = client.get('/api/analysis/timeseries',
+                              query_string={'granularity': granularity, 'from': '0001-01-01', 'to': '0001-01-31'})
+        assert response.status_code == 200, response.get_json()
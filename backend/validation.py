@@ -0,0 +1,46 @@
+# backend/validation.py
+
+import math
+from datetime import datetime
+
+REQUIRED_TRANSACTION_FIELDS = ('amount', 'date')
+MAX_AMOUNT = 10 ** 12
+
+
+def parse_transaction_date(value):
+    """Parse a transaction date the way the API always has: YYYY-MM-DD, then ISO 8601, else now."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return datetime.utcnow()
+
+
+def parse_amount(value):
+    """A finite amount in rupees. Raises ValueError for anything else."""
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid amount: {value!r}")
+    # Paise are stored as 64-bit integers, so keep amounts (and their sums) well inside that
+    if not math.isfinite(amount) or abs(amount) > MAX_AMOUNT:
+        raise ValueError(f"Invalid amount: {value!r}")
+    return amount
+
+
+def transaction_values(data):
+    """Validate an incoming transaction payload and return column values.
+
+    Raises ValueError when a required field is missing or the amount is not a number.
+    A missing category comes back as None for the categorization rules to fill in.
+    """
+    if any(data.get(field) in (None, '') for field in REQUIRED_TRANSACTION_FIELDS):
+        raise ValueError('Missing required fields')
+    return {
+        'date': parse_transaction_date(str(data['date'])),
+        'amount': parse_amount(data['amount']),
+        'category': data.get('category') or None,
+        'description': data.get('description') or ''
+    }
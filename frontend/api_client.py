@@ -0,0 +1,333 @@
+import os
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import json
+import pandas as pd
+import pyarrow as pa
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = os.environ.get("SAVEEAZY_API_URL", "https://saveeazy.onrender.com/api")
+TIMEOUT = 30
+CACHE_TTL = 300
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+TRANSACTION_COLUMNS = ['id', 'date', 'amount', 'category', 'description']
+ACCOUNT_HEADER = "X-Account-Id"
+DEFAULT_ACCOUNT = os.environ.get("SAVEEAZY_ACCOUNT", "default")
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # older Streamlit without the runtime package
+    add_script_run_ctx = get_script_run_ctx = None
+
+# --------------------- Connection ---------------------
+@st.cache_resource
+def _session():
+    """One keep-alive session per server process, so calls reuse open TLS connections."""
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=["GET"]
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+@st.cache_resource
+def _etag_store():
+    """Last ETag and body per URL, so expired cache entries can be revalidated with a 304."""
+    return {}, threading.Lock()
+
+def current_account():
+    """The account this browser session works on; the backend keeps each one separate."""
+    return st.session_state.get("account") or DEFAULT_ACCOUNT
+
+def _headers(account=None):
+    return {ACCOUNT_HEADER: account or current_account()}
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _get_json(path, params=None, account=DEFAULT_ACCOUNT):
+    url = requests.Request("GET", f"{API_URL}{path}", params=params).prepare().url
+    store, lock = _etag_store()
+    with lock:
+        cached = store.get((account, url))
+    headers = _headers(account)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+    response = _session().get(url, headers=headers, timeout=TIMEOUT)
+    if cached and response.status_code == 304:
+        return cached[1]
+    response.raise_for_status()
+    data = response.json()
+    etag = response.headers.get("ETag")
+    if etag:
+        with lock:
+            store[(account, url)] = (etag, data)
+    return data
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _get_frame(path, params=None, account=DEFAULT_ACCOUNT):
+    """GET an endpoint as an Arrow stream and return (DataFrame, schema metadata).
+
+    Columns arrive already typed (datetime64, float64), so no per-row parsing is needed.
+    """
+    response = _session().get(f"{API_URL}{path}", params=params, headers=dict(_headers(account), Accept=ARROW_STREAM), timeout=TIMEOUT)
+    response.raise_for_status()
+    table = pa.ipc.open_stream(response.content).read_all()
+    metadata = {key.decode(): json.loads(value) for key, value in (table.schema.metadata or {}).items()}
+    return table.to_pandas(), metadata
+
+def clear_cache():
+    """Drop memoized reads; call after anything that changes data on the server."""
+    _get_json.clear()
+    _get_frame.clear()
+
+def _fetch(path, params, what, default, as_frame=False):
+    try:
+        return (_get_frame if as_frame else _get_json)(path, params, current_account())
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error fetching {what}: {e}")
+        return default
+
+def fetch_all(calls):
+    """Fetch several independent endpoints concurrently.
+
+    `calls` maps a name to (path, params, what, default[, as_frame]). Returns a dict with
+    the same keys. Errors are reported from the calling thread once every request has
+    finished.
+    """
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+    account = current_account()
+
+    def run(path, params, as_frame):
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        try:
+            return (_get_frame if as_frame else _get_json)(path, params, account)
+        except requests.exceptions.RequestException as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        futures = {
+            name: pool.submit(run, spec[0], spec[1], len(spec) > 4 and spec[4])
+            for name, spec in calls.items()
+        }
+
+    results = {}
+    for name, future in futures.items():
+        result = future.result()
+        if isinstance(result, requests.exceptions.RequestException):
+            _, _, what, default = calls[name][:4]
+            st.error(f"Error fetching {what}: {result}")
+            result = default
+        results[name] = result
+    return results
+
+# --------------------- Accounts ---------------------
+def account_exists(account):
+    """Whether the server has this account; new ones must be created with create_account()."""
+    known = st.session_state.setdefault('known_accounts', set())
+    if account in known:
+        return True
+    try:
+        response = _session().get(f"{API_URL}/accounts/{account}", timeout=TIMEOUT)
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error checking account: {e}")
+        return False
+    known.add(account)
+    return True
+
+def create_account(account):
+    try:
+        response = _session().post(f"{API_URL}/accounts", json={'account': account}, timeout=TIMEOUT)
+        # 409: someone else just created it, which is just as good
+        if response.status_code != 409:
+            response.raise_for_status()
+        return True
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error creating account: {e}")
+        return False
+    finally:
+        clear_cache()
+
+# --------------------- Reads ---------------------
+def empty_transactions():
+    return pd.DataFrame(columns=TRANSACTION_COLUMNS), {'next_cursor': None}
+
+def get_transactions(params=None):
+    """One page of transactions as (DataFrame, metadata with 'next_cursor')."""
+    return _fetch("/transactions", params, "transactions", empty_transactions(), as_frame=True)
+
+def search_transactions(params):
+    """One page of description matches, best first, as (DataFrame, metadata with 'next_cursor')."""
+    return _fetch("/transactions/search", params, "search results", empty_transactions(), as_frame=True)
+
+def _passes_filters(row, params):
+    """Whether a change-feed row passes the from/to/category filters of a listing."""
+    day = row['date'][:10]
+    categories = [c for c in (params.get('category') or '').split(',') if c]
+    return ((not params.get('from') or day >= params['from'])
+            and (not params.get('to') or day <= params['to'])
+            and (not categories or row['category'] in categories))
+
+def _page_changes(df, params, changed, deleted):
+    """Patch a listing page with change-feed rows, or return None if it must be reloaded.
+
+    Rows already on the page that keep their date and still pass the filters are updated
+    in place. A deleted row, a moved row or a new row that sorts into the page's range
+    changes which rows the page holds, so that takes a reload.
+    """
+    positions = {row_id: i for i, row_id in enumerate(df['id'])}
+    if any(row_id in positions for row_id in deleted):
+        return None
+    full = len(df) >= int(params['limit'])
+    first = (df['date'].iat[0], df['id'].iat[0]) if len(df) else None
+    last = (df['date'].iat[-1], df['id'].iat[-1]) if len(df) else None
+    updates = []
+    for row in changed:
+        i = positions.get(row['id'])
+        passes = _passes_filters(row, params)
+        key = (datetime.fromisoformat(row['date']), row['id'])
+        if i is None:
+            # Pages run newest first; a new row only lands here between its neighbours
+            after_page = full and last is not None and key < last
+            before_page = params.get('cursor') and first is not None and key > first
+            if passes and not (after_page or before_page):
+                return None
+        elif not passes or key[0] != df['date'].iat[i]:
+            return None
+        else:
+            updates.append((i, row))
+    if updates:
+        df = df.copy()
+        for i, row in updates:
+            for column in ('amount', 'category', 'description'):
+                df.iat[i, df.columns.get_loc(column)] = row[column]
+    return df
+
+def transactions_page(params):
+    """One page of transactions, kept in session state and refreshed from the change feed.
+
+    The page is downloaded once per set of params. On later reruns only the rows changed
+    since then are fetched and applied to it; the page is downloaded again only when a
+    change alters which rows it holds, or when more changed than one feed page returns.
+    """
+    state = st.session_state
+    key = (current_account(), tuple(sorted(params.items())))
+    window = state.get('txn_window')
+    if window is None or window['key'] != key:
+        page = get_transactions(params)
+        state['txn_window'] = {'key': key, 'page': page, 'cursor': page[1].get('sync_cursor')}
+        return page
+    df, meta = window['page']
+    if not window['cursor']:
+        return window['page']
+    try:
+        response = _session().get(f"{API_URL}/transactions/changes", params={'since': window['cursor']},
+                                  headers=_headers(), timeout=TIMEOUT)
+        response.raise_for_status()
+        feed = response.json()
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error refreshing transactions: {e}")
+        return window['page']
+
+    patched = None if feed['has_more'] else _page_changes(df, params, feed['changes'], feed['deleted'])
+    if patched is None:
+        # Cached reads of this account are as stale as the page
+        clear_cache()
+        state['txn_window'] = None
+        return transactions_page(params)
+    window['page'] = (patched, meta)
+    window['cursor'] = feed['cursor']
+    return window['page']
+
+def get_categories():
+    return _fetch("/categories", None, "categories", [])
+
+def get_spending_patterns():
+    return _fetch("/analysis/spending_patterns", None, "spending patterns", {})
+
+def get_timeseries(params):
+    """Spending per bucket as (DataFrame, metadata): a 'bucket' column, one column per
+    category named with metadata['category_prefix'] in front, then the '_' stats."""
+    return _fetch("/analysis/timeseries", params, "spending over time", (pd.DataFrame(), {}), as_frame=True)
+
+# --------------------- Reports ---------------------
+def submit_report(kind, params):
+    """Start a background report and return its job id, or None."""
+    try:
+        response = _session().post(f"{API_URL}/reports", json={'kind': kind, 'params': params},
+                                   headers=_headers(), timeout=TIMEOUT)
+        response.raise_for_status()
+        return response.json()['id']
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error starting report: {e}")
+        return None
+
+def get_report(job_id):
+    """The report job's status (and result once done), or None if it is gone. Never cached."""
+    try:
+        response = _session().get(f"{API_URL}/reports/{job_id}", headers=_headers(), timeout=TIMEOUT)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error fetching report: {e}")
+        return None
+
+# --------------------- Writes ---------------------
+def add_transaction(transaction_data):
+    try:
+        response = _session().post(f"{API_URL}/transactions", json=transaction_data, timeout=TIMEOUT, headers=_headers())
+        response.raise_for_status()
+        return response.status_code == 201
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error adding transaction: {e}")
+        return False
+    finally:
+        clear_cache()
+
+def import_transactions(uploaded_file):
+    fmt = 'ndjson' if uploaded_file.name.endswith(('.ndjson', '.jsonl')) else 'csv'
+    try:
+        response = _session().post(f"{API_URL}/transactions/bulk", params={'format': fmt}, data=uploaded_file, headers=_headers())
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error importing transactions: {e}")
+        return None
+    finally:
+        clear_cache()
+
+def delete_transactions(transaction_ids):
+    try:
+        response = _session().delete(f"{API_URL}/transactions", json={'ids': transaction_ids}, timeout=TIMEOUT, headers=_headers())
+        response.raise_for_status()
+        return response.status_code == 200
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error deleting transactions: {e}")
+        return False
+    finally:
+        clear_cache()
+
+def update_budget(budget_data):
+    try:
+        response = _session().post(f"{API_URL}/budget", json=budget_data, timeout=TIMEOUT, headers=_headers())
+        response.raise_for_status()
+        return response.status_code == 201
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error updating budget: {e}")
+        return False
+    finally:
+        clear_cache()
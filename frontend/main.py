@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
-import requests
 import altair as alt
-from datetime import datetime
-
-API_URL = "https://saveeazy.onrender.com/api"
+import time
+from datetime import datetime, timedelta
+from api_client import (
+    fetch_all, transactions_page, search_transactions, empty_transactions, add_transaction, import_transactions,
+    delete_transactions, update_budget, get_categories, get_spending_patterns, get_timeseries,
+    submit_report, get_report, current_account, account_exists, create_account, DEFAULT_ACCOUNT
+)
 
 st.set_page_config(page_title="SaveEazy", page_icon="💰", layout="wide")
 st.title("SaveEazy")
@@ -12,151 +15,160 @@ st.markdown("Track your finances, set budgets, and analyze your spending pattern
 
 # Sidebar navigation
 page = st.sidebar.radio("Navigation", ["Dashboard", "Transactions", "Budget", "Analysis"])
-
-# --------------------- API Helpers ---------------------
-def get_transactions():
-    try:
-        response = requests.get(f"{API_URL}/transactions")
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error fetching transactions: {e}")
-        return []
-
-def add_transaction(transaction_data):
-    try:
-        response = requests.post(f"{API_URL}/transactions", json=transaction_data)
-        response.raise_for_status()
-        return response.status_code == 201
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error adding transaction: {e}")
-        return False
-
-def delete_transaction(transaction_id):
-    try:
-        response = requests.delete(f"{API_URL}/transactions/{transaction_id}")
-        response.raise_for_status()
-        return response.status_code == 200
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error deleting transaction: {e}")
-        return False
-
-def get_budget():
-    try:
-        response = requests.get(f"{API_URL}/budget")
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error fetching budget: {e}")
-        return []
-
-def update_budget(budget_data):
-    try:
-        response = requests.post(f"{API_URL}/budget", json=budget_data)
-        response.raise_for_status()
-        return response.status_code == 201
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error updating budget: {e}")
-        return False
-
-def get_categories():
-    try:
-        response = requests.get(f"{API_URL}/categories")
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error fetching categories: {e}")
-        return []
-
-def get_budget_summary():
-    try:
-        response = requests.get(f"{API_URL}/analysis/budget_summary")
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error fetching budget summary: {e}")
-        return {}
-
-def get_spending_patterns():
-    try:
-        response = requests.get(f"{API_URL}/analysis/spending_patterns")
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error fetching spending patterns: {e}")
-        return {}
+# Each account's data is kept separately on the server
+st.sidebar.text_input("Account", value=DEFAULT_ACCOUNT, key="account")
+if not account_exists(current_account()):
+    st.warning(f"There is no account named '{current_account()}' yet.")
+    if st.button("Create account"):
+        if create_account(current_account()):
+            st.rerun()
+    st.stop()
+
+# --------------------- Shared Widgets ---------------------
+AUTO_CATEGORY = "Auto (from rules)"
+REPORT_POLL_SECONDS = 1
+REPORT_WAIT_SECONDS = 300
+
+TRANSACTION_COLUMNS = {
+    'date': st.column_config.DateColumn("Date", format="YYYY-MM-DD"),
+    'category': st.column_config.TextColumn("Category"),
+    'amount': st.column_config.NumberColumn("Amount (INR)", format="₹%.0f"),
+    'description': st.column_config.TextColumn("Description")
+}
+
+def transaction_grid(df, key):
+    """Render transactions as one selectable grid and return the ids of the selected rows."""
+    df = df.assign(date=df['date'].dt.date)
+    event = st.dataframe(
+        df,
+        key=key,
+        hide_index=True,
+        use_container_width=True,
+        column_order=list(TRANSACTION_COLUMNS),
+        column_config=TRANSACTION_COLUMNS,
+        on_select="rerun",
+        selection_mode="multi-row"
+    )
+    return df['id'].iloc[event.selection.rows].tolist()
+
+def delete_selected(selected_ids, key):
+    if st.button(f"🗑️ Delete {len(selected_ids)} selected", key=key, disabled=not selected_ids):
+        if delete_transactions(selected_ids):
+            st.success(f"Deleted {len(selected_ids)} transactions.")
+            st.rerun()
 
 # --------------------- Transactions Page ---------------------
 if page == "Transactions":
     st.header("All Transactions")
-    transactions = get_transactions()
-    if transactions:
-        df = pd.DataFrame(transactions)
-        df['date'] = pd.to_datetime(df['date'])
-
-        with st.expander("🔍 Filter Transactions"):
-            col1, col2 = st.columns(2)
-            with col1:
-                start_date = st.date_input("Start Date", value=df['date'].min().date())
-            with col2:
-                end_date = st.date_input("End Date", value=df['date'].max().date())
-            category_filter = st.multiselect("Category", options=df['category'].unique(), default=list(df['category'].unique()))
-
-            df = df[(df['date'].dt.date >= start_date) & (df['date'].dt.date <= end_date)]
-            df = df[df['category'].isin(category_filter)]
-
-        df_display = df.sort_values("date", ascending=False).copy()
-        df_display['date'] = df_display['date'].dt.strftime('%Y-%m-%d')
-        df_display['amount'] = df_display['amount'].apply(lambda x: f"₹{x:,.0f}")
-
-        st.markdown("###  Transactions List (with Delete Option)")
-        for _, row in df_display.iterrows():
-            col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 3, 1])
-            col1.write(row['date'])
-            col2.write(row['category'])
-            col3.write(row['amount'])
-            col4.write(row['description'])
-            if col5.button("🗑️", key=f"del_txn_{row['id']}"):
-                if delete_transaction(row['id']):
-                    st.success("Transaction deleted.")
-                    st.rerun()
+    categories = get_categories()
+
+    with st.expander("🔍 Filter Transactions"):
+        col1, col2 = st.columns(2)
+        # Left empty, the range is open on that side, so every transaction is listed by default
+        with col1:
+            start_date = st.date_input("Start Date", value=None)
+        with col2:
+            end_date = st.date_input("End Date", value=None)
+        category_filter = st.multiselect("Category", options=categories, default=categories)
+        search_text = st.text_input("Search descriptions")
+
+    page_size = st.selectbox("Rows per page", [100, 500, 1000], index=0)
+    filter_key = (current_account(), start_date, end_date, tuple(category_filter), search_text, page_size)
+    if st.session_state.get('txn_filter_key') != filter_key:
+        # Filters changed, go back to the first page
+        st.session_state['txn_filter_key'] = filter_key
+        st.session_state['txn_cursors'] = [None]
+    cursors = st.session_state['txn_cursors']
+
+    params = {
+        'from': start_date.isoformat() if start_date else None,
+        'to': end_date.isoformat() if end_date else None,
+        # With every category selected, send none, so rows whose category is no longer
+        # in the categories table are still listed
+        'category': None if set(category_filter) == set(categories) else ','.join(category_filter),
+        'limit': page_size,
+        'cursor': cursors[-1]
+    }
+    if not category_filter:
+        transactions, page_meta = empty_transactions()
+    elif search_text.strip():
+        # Ranked matches come from the server's full-text index, a page at a time
+        transactions, page_meta = search_transactions(dict(params, q=search_text))
+    else:
+        # The page stays in the session and only changes made since are fetched on reruns
+        transactions, page_meta = transactions_page(params)
+
+    if not transactions.empty:
+        st.markdown("###  Transactions List (select rows to delete)")
+        selected_ids = transaction_grid(transactions, key="txn_grid")
+        delete_selected(selected_ids, key="del_txns")
 
     else:
         st.info("No transactions found.")
 
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if len(cursors) > 1 and st.button("⬅️ Previous"):
+            cursors.pop()
+            st.rerun()
+    with col_page:
+        st.caption(f"Page {len(cursors)}")
+    with col_next:
+        if page_meta.get('next_cursor') and st.button("Next ➡️"):
+            cursors.append(page_meta['next_cursor'])
+            st.rerun()
+
     st.markdown("---")
     st.subheader("➕ Add New Transaction")
     with st.form("add_transaction_form"):
-        categories = get_categories()
         col1, col2 = st.columns(2)
         with col1:
             date = st.date_input("Date", value=datetime.today())
             amount = st.number_input("Amount (INR)", min_value=0)
         with col2:
-            category = st.selectbox("Category", categories if categories else ["Uncategorized"])
+            category = st.selectbox("Category", [AUTO_CATEGORY] + categories)
             description = st.text_input("Description")
         submitted = st.form_submit_button("Add Transaction")
         if submitted:
             new_transaction = {
                 "date": date.isoformat(),
                 "amount": amount,
-                "category": category,
                 "description": description
             }
+            if category != AUTO_CATEGORY:
+                new_transaction["category"] = category
             if add_transaction(new_transaction):
                 st.success("Transaction added!")
                 st.rerun()
             else:
                 st.error("Failed to add transaction.")
 
+    with st.expander("📥 Import Bank Statement"):
+        st.caption("CSV with date, amount, category and description columns, or NDJSON with the same fields. "
+                   "Rows without a category are categorized by your rules.")
+        uploaded_file = st.file_uploader("Statement file", type=["csv", "ndjson", "jsonl"])
+        if uploaded_file is not None and st.button("Import"):
+            summary = import_transactions(uploaded_file)
+            if summary:
+                st.success(f"Imported {summary['inserted']} transactions.")
+                if summary['failed']:
+                    st.warning(f"{summary['failed']} rows were skipped.")
+                    st.dataframe(pd.DataFrame(summary['errors']), use_container_width=True)
+
 # --------------------- Dashboard Page ---------------------
 elif page == "Dashboard":
     st.header("Finance Dashboard")
     try:
+        # The panels are independent, so fetch them at the same time
+        dashboard = fetch_all({
+            'summary': ("/analysis/budget_summary", None, "budget summary", {}),
+            'forecast': ("/analysis/forecast", None, "forecast", {}),
+            'recent': ("/transactions", {'limit': 10}, "transactions", empty_transactions(), True)
+        })
         col1, col2 = st.columns(2)
         with col1:
             st.subheader("Monthly Budget Summary")
-            budget_summary = get_budget_summary()
+            budget_summary = dashboard['summary']
             if budget_summary and 'categories' in budget_summary:
                 summary_data = {
                     'Category': [],
@@ -170,7 +182,8 @@ elif page == "Dashboard":
                     summary_data['Budget (INR)'].append(f"₹{cat['budget']:,}")
                     summary_data['Spent (INR)'].append(f"₹{cat['spent']:,}")
                     summary_data['Remaining (INR)'].append(f"₹{cat['remaining']:,}")
-                    summary_data['% Used'].append(f"{cat['percent_used']:.1f}%")
+                    percent_used = cat['percent_used']
+                    summary_data['% Used'].append(f"{percent_used:.1f}%" if percent_used is not None else "No budget")
                 df_summary = pd.DataFrame(summary_data)
                 st.dataframe(df_summary, use_container_width=True)
 
@@ -184,28 +197,32 @@ elif page == "Dashboard":
             else:
                 st.info("No budget data available. Set up your budget in the Budget tab.")
 
+            forecast = dashboard['forecast']
+            if forecast and forecast.get('categories'):
+                st.subheader("Month-end Forecast")
+                st.caption(f"Day {forecast['day']} of {forecast['days_in_month']}, "
+                           f"based on the last {forecast['history_months']} months")
+                df_forecast = pd.DataFrame([{
+                    'Category': cat['category'],
+                    'Spent (INR)': f"₹{cat['spent']:,.0f}",
+                    'Projected (INR)': f"₹{cat['projected']:,.0f}",
+                    'Likely range (INR)': f"₹{cat['projected_low']:,.0f} – ₹{cat['projected_high']:,.0f}",
+                    'Budget (INR)': f"₹{cat['budget']:,.0f}" if cat['budget'] else "No budget",
+                    'Overrun risk': cat['overrun_probability']
+                } for cat in forecast['categories']])
+                df_forecast = df_forecast.sort_values('Overrun risk', ascending=False, na_position='last')
+                df_forecast['Overrun risk'] = df_forecast['Overrun risk'].map(
+                    lambda p: f"{p:.0%}" if pd.notna(p) else "–"
+                )
+                st.dataframe(df_forecast, use_container_width=True, hide_index=True)
+                st.metric("Projected Month-end Spend (INR)", f"₹{forecast['total_projected']:,.0f}")
+
         with col2:
             st.subheader("Recent Transactions")
-            transactions = get_transactions()
-            if transactions:
-                df_transactions = pd.DataFrame(transactions)
-                df_transactions['date'] = pd.to_datetime(df_transactions['date'])
-                df_transactions = df_transactions.sort_values('date', ascending=False).head(10)
-                df_display = df_transactions[['id', 'date', 'category', 'amount', 'description']].copy()
-                df_display['date'] = df_display['date'].dt.strftime('%Y-%m-%d')
-                df_display['amount'] = df_display['amount'].apply(lambda x: f"₹{x:,.0f}")
-
-                for _, row in df_display.iterrows():
-                    col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 3, 1])
-                    col1.write(row['date'])
-                    col2.write(row['category'])
-                    col3.write(row['amount'])
-                    col4.write(row['description'])
-                    if col5.button("🗑️", key=f"dash_del_txn_{row['id']}"):
-
-                        if delete_transaction(row['id']):
-                            st.success("Transaction deleted from dashboard.")
-                            st.rerun()
+            transactions, _ = dashboard['recent']
+            if not transactions.empty:
+                selected_ids = transaction_grid(transactions, key="dash_txn_grid")
+                delete_selected(selected_ids, key="dash_del_txns")
             else:
                 st.info("No recent transactions available.")
     except Exception as e:
@@ -215,6 +232,12 @@ elif page == "Dashboard":
 elif page == "Budget":
     st.header("Set Monthly Budget by Category")
     categories = get_categories()
+    today = datetime.today()
+    month_options = [(today.replace(day=1) + pd.DateOffset(months=i)).strftime('%Y-%m') for i in range(-1, 12)]
+    applies_to = st.selectbox("Applies to", ["All months"] + month_options,
+                              help="All months replaces these budgets everywhere, including months budgeted "
+                                   "separately. Pick a month to budget from that month onwards without "
+                                   "changing earlier months.")
     budget_data = []
     for category in categories:
         col1, col2 = st.columns([3, 1])
@@ -225,7 +248,10 @@ elif page == "Budget":
             rounded_amount = round(amount / 100) * 100
             budget_data.append({"category": category, "budget": rounded_amount})
     if st.button("Submit Budget"):
-        if update_budget({"budgets": budget_data}):
+        payload = {"budgets": budget_data}
+        if applies_to != "All months":
+            payload["month"] = applies_to
+        if update_budget(payload):
             st.success("Budget updated successfully!")
         else:
             st.error("Failed to update budget.")
@@ -233,30 +259,50 @@ elif page == "Budget":
 # --------------------- Analysis Page ---------------------
 elif page == "Analysis":
     st.header("Spending Analysis")
+
+    st.subheader("Spending Over Time")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        granularity = st.selectbox("Granularity", ["day", "week", "month"], index=1)
+    with col2:
+        ts_start = st.date_input("From", value=datetime.today() - timedelta(days=180), key="ts_from")
+    with col3:
+        ts_end = st.date_input("To", value=datetime.today(), key="ts_to")
+    df_ts, ts_meta = get_timeseries({
+        'granularity': granularity,
+        'from': ts_start.isoformat(),
+        'to': ts_end.isoformat()
+    })
+
+    if not df_ts.empty and df_ts['_total'].sum() > 0:
+        df_ts = df_ts.set_index('bucket')
+        # Category columns carry a prefix so no category name can clash with the others
+        prefix = ts_meta['category_prefix']
+        category_columns = [c for c in df_ts.columns if c.startswith(prefix)]
+        df_long = (
+            df_ts[category_columns].rename(columns=lambda c: c[len(prefix):])
+            .rename_axis('date').reset_index()
+            .melt(id_vars='date', var_name='category', value_name='spending')
+        )
+        chart = alt.Chart(df_long).mark_area().encode(
+            x='date:T',
+            y=alt.Y('spending:Q', stack=True, title='Amount Spent (₹)'),
+            color='category:N',
+            tooltip=['date:T', 'category:N', 'spending:Q']
+        ).properties(width=700, height=400)
+        st.altair_chart(chart, use_container_width=True)
+
+        df_trend = df_ts[['_cumulative', '_rolling_mean']].rename(columns={
+            '_cumulative': 'Cumulative',
+            '_rolling_mean': f"{ts_meta['window']}-{granularity} average"
+        })
+        st.line_chart(df_trend)
+    else:
+        st.warning("Not enough data to display spending over time.")
+
     spending_data = get_spending_patterns()
 
     if spending_data:
-        if 'by_date' in spending_data:
-            df_date = pd.DataFrame(spending_data['by_date'])
-
-            if 'spending' in df_date.columns:
-                df_date['spending'] = df_date['spending'].apply(lambda x: x[0] if isinstance(x, list) and len(x) > 0 else x)
-
-            df_date['spending'] = pd.to_numeric(df_date['spending'], errors='coerce')
-            df_date = df_date.dropna(subset=['spending'])
-
-            if not df_date.empty and df_date['spending'].sum() > 0:
-                st.subheader("Spending Over Time")
-                df_date['date'] = pd.to_datetime(df_date['month'])
-                chart = alt.Chart(df_date).mark_line(point=True).encode(
-                    x='date:T',
-                    y=alt.Y('spending:Q', title='Amount Spent (₹)'),
-                    tooltip=['date:T', 'spending:Q']
-                ).properties(width=700, height=400)
-                st.altair_chart(chart, use_container_width=True)
-            else:
-                st.warning("Not enough data to display spending over time.")
-
         if 'by_category' in spending_data:
             df_cat = pd.DataFrame(spending_data['by_category'])
 
@@ -278,6 +324,55 @@ elif page == "Analysis":
     else:
         st.info("No spending data available yet.")
 
+    st.subheader("Budget vs Actual Report")
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        report_from = st.date_input("From month", value=datetime.today() - timedelta(days=730), key="report_from")
+    with col2:
+        report_to = st.date_input("To month", value=datetime.today(), key="report_to")
+    with col3:
+        st.write("")
+        if st.button("Run report"):
+            # Built in the background; the fragment below polls until it is ready
+            st.session_state['report_result'] = None
+            st.session_state['report_deadline'] = time.monotonic() + REPORT_WAIT_SECONDS
+            st.session_state['report_job'] = submit_report('budget_summary', {
+                'from': report_from.strftime('%Y-%m'),
+                'to': report_to.strftime('%Y-%m')
+            })
+
+    @st.fragment(run_every=REPORT_POLL_SECONDS)
+    def poll_report():
+        job = get_report(st.session_state['report_job'])
+        if job is not None and job['status'] in ('queued', 'running'):
+            if time.monotonic() < st.session_state['report_deadline']:
+                st.info(f"Preparing report ({job['status']})...")
+                return
+            job = dict(job, status='failed', error="Gave up waiting for the report, try again later.")
+        # Finished (or expired): rerun the whole page once to stop polling and show it
+        st.session_state['report_job'] = None
+        st.session_state['report_result'] = job
+        st.rerun()
+
+    if st.session_state.get('report_job'):
+        poll_report()
+
+    report = st.session_state.get('report_result')
+    if report and report['status'] == 'failed':
+        st.error(f"Report failed: {report['error']}")
+    elif report:
+        result = report['result']
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Total Budget", f"₹{result['total_budget']:,.0f}")
+        col2.metric("Total Spent", f"₹{result['total_spent']:,.0f}")
+        col3.metric("Used", f"{result['overall_percent_used']:.1f}%")
+        df_report = pd.DataFrame([{
+            'month': f"{m['year']}-{datetime.strptime(m['month'], '%B').month:02d}",
+            'Budget': m['total_budget'],
+            'Spent': m['total_spent']
+        } for m in result['months']]).set_index('month')
+        st.bar_chart(df_report, stack=False)
+
 # --------------------- Footer ---------------------
 st.sidebar.markdown("---")
 st.sidebar.info("This is a personal finance analyzer built with Flask + Streamlit.")